@@ -16,6 +16,34 @@ except NameError:
     print(f"Warning: Could not determine script directory. Assuming CWD is project root: {ROOT}")
     print(f"Database path set to: {DB_PATH}")
 
+# Lets per-listing history lookups seek to a listing's changes instead of
+# scanning the whole table
+LISTING_CHANGES_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_changes_listing_time "
+    "ON listing_changes(listing_id, changed_at DESC, field_name)"
+)
+
+def has_leading_index(conn, table, column):
+    """Return True if a (non-partial) index on table has column as its first column."""
+    row = conn.execute("""
+        SELECT 1
+        FROM pragma_index_list(?) AS il
+        JOIN pragma_index_info(il.name) AS ii
+        WHERE ii.seqno = 0 AND ii.name = ? AND NOT il.partial
+        LIMIT 1
+    """, (table, column)).fetchone()
+    return row is not None
+
+def ensure_indexes(conn, statements, label):
+    """Run the given CREATE INDEX statements, warning instead of failing if they can't be."""
+    try:
+        for statement in statements:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error as e:
+        # Queries still work without the indexes, just slower (e.g. read-only database)
+        print(f"⚠️ Could not create {label}: {e}")
+
 def ensure_tables_exist(conn):
     """Ensure required tables (listings, listing_changes, address_blacklist) exist."""
     cursor = conn.cursor()
@@ -39,6 +67,7 @@ def ensure_tables_exist(conn):
             FOREIGN KEY (listing_id) REFERENCES listings(id) ON DELETE CASCADE
         )
     """)
+    cursor.execute(LISTING_CHANGES_INDEX_SQL)
     # Ensure address_blacklist table exists
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS address_blacklist (
@@ -116,7 +145,11 @@ def update_listing(conn: sqlite3.Connection, listing_id: int, updates: Dict[str,
         return False
 
 def insert_listings(listings, source="compass"):
-    """Insert new listings or update existing ones, skipping blacklisted addresses."""
+    """Insert new listings or update existing ones, skipping blacklisted addresses.
+
+    listings can be any iterable of listing dicts, including a generator; it
+    is consumed in a single pass.
+    """
     if not DB_PATH.parent.exists():
         print(f"Error: Data directory {DB_PATH.parent} does not exist.")
         return
@@ -1,9 +1,22 @@
 
-from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 import re
 import html
 import urllib.parse
 
+# Beds, baths and sqft in one scan of the details text. The lookahead lets
+# matches overlap, so each field still finds its leftmost occurrence.
+_DETAILS_RE = re.compile(r'(?=(?P<beds>\d+) BD|(?P<baths>\d+) BA|(?P<sqft>[\d,]+) Sq\.Ft\.)')
+
+# Each lookup below runs as one XPath query inside libxml2 rather than a
+# Python-level walk of the row.
+_LISTING_ROWS = "//tr[contains(concat(' ', normalize-space(@class), ' '), ' listingComponentV2 ')]"
+_PRICE_TAG = ".//b[contains(concat(' ', normalize-space(@class), ' '), ' displayPriceStyle ')]"
+_DETAILS_DIV = ".//div[contains(@style, 'color: #000')]"
+
+def _stripped_text(element, separator=""):
+    return separator.join(s for s in (t.strip() for t in element.itertext()) if s)
+
 def extract_address_from_url(url):
     parsed = urllib.parse.urlparse(html.unescape(url))
     query = urllib.parse.parse_qs(parsed.query)
@@ -13,40 +26,44 @@ def extract_address_from_url(url):
     return None
 
 def parse_compass_email(html_content):
-    soup = BeautifulSoup(html.unescape(html_content), 'html.parser')
     listings = []
+    if not html_content:
+        return listings
+
+    # Parse bytes so an XML encoding declaration in the email doesn't trip lxml
+    parser = lxml_html.HTMLParser(encoding='utf-8')
+    tree = lxml_html.document_fromstring(html.unescape(html_content).encode('utf-8'), parser=parser)
 
-    for listing_div in soup.find_all('tr', class_='listingComponentV2'):
+    for listing_div in tree.xpath(_LISTING_ROWS):
         try:
-            anchors = listing_div.find_all('a', href=True)
             address = None
             url = None
 
-            for a in anchors:
-                href = a['href']
-                text = a.get_text(strip=True)
+            for a in listing_div.xpath(".//a[@href]"):
+                href = a.get('href')
                 if 'compass.com/listing' in href:
                     url = href
-                    address = text
+                    address = _stripped_text(a)
                     break
 
             if not address or address.strip() == "":
                 address = extract_address_from_url(url)
 
-            price_tag = listing_div.find('b', class_='displayPriceStyle')
-            price_text = price_tag.get_text(strip=True).replace('$', '').replace(',', '') if price_tag else None
+            price_tags = listing_div.xpath(_PRICE_TAG)
+            price_tag = price_tags[0] if price_tags else None
+            price_text = _stripped_text(price_tag).replace('$', '').replace(',', '') if price_tag is not None else None
             price = int(price_text) if price_text and price_text.isdigit() else None
 
-            details_div = listing_div.find('div', style=lambda val: val and 'color: #000' in val)
-            details_text = details_div.get_text(" ", strip=True) if details_div else ""
+            details_divs = listing_div.xpath(_DETAILS_DIV)
+            details_text = _stripped_text(details_divs[0], " ") if details_divs else ""
 
-            beds_match = re.search(r'(\d+) BD', details_text)
-            baths_match = re.search(r'(\d+) BA', details_text)
-            sqft_match = re.search(r'([\d,]+) Sq\.Ft\.', details_text)
+            details = {}
+            for m in _DETAILS_RE.finditer(details_text):
+                details.setdefault(m.lastgroup, m.group(m.lastgroup))
 
-            beds = int(beds_match.group(1)) if beds_match else None
-            baths = int(baths_match.group(1)) if baths_match else None
-            sqft = int(sqft_match.group(1).replace(',', '')) if sqft_match else None
+            beds = int(details['beds']) if 'beds' in details else None
+            baths = int(details['baths']) if 'baths' in details else None
+            sqft = int(details['sqft'].replace(',', '')) if 'sqft' in details else None
 
             listings.append({
                 'address': address,
@@ -1,6 +1,5 @@
 import os.path
 import base64
-from email import message_from_bytes
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
@@ -8,6 +7,16 @@ import pickle
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Gmail caps a single batch HTTP request at 100 calls
+GMAIL_BATCH_SIZE = 100
+
+# Only the parts of a message the Gmail fetchers read: headers for logging
+# and the MIME tree down to the nested parts of multipart/mixed mail
+GMAIL_MESSAGE_FIELDS = (
+    'payload(mimeType,headers,body/data,'
+    'parts(mimeType,body/data,parts(mimeType,body/data)))'
+)
+
 def get_script_dir():
     """Get the absolute path to the directory containing this script."""
     return os.path.dirname(os.path.abspath(__file__))
@@ -93,6 +102,28 @@ def authenticate_gmail(credentials_path=None, token_path=None):
         traceback.print_exc()
         return None
 
+def find_html_body(payload):
+    """Breadth-first search of a Gmail payload for the first text/html body.
+
+    Shallower parts win, so a forwarded message nested in multipart/mixed mail
+    doesn't shadow the top-level HTML. Messages fetched with
+    GMAIL_MESSAGE_FIELDS only include parts down to payload.parts.parts, so
+    the depth is at most 2.
+
+    Returns (base64url data, depth), or (None, None) if there is no HTML part.
+    """
+    level = [payload]
+    depth = 0
+    while level:
+        for part in level:
+            if part.get('mimeType') == 'text/html':
+                data = part.get('body', {}).get('data')
+                if data:
+                    return data, depth
+        level = [subpart for part in level for subpart in part.get('parts', ())]
+        depth += 1
+    return None, None
+
 def fetch_emails_with_label(service, label_id, max_results=10):
     """Fetch emails with a specific label."""
     try:
@@ -112,15 +143,32 @@ def fetch_emails_with_label(service, label_id, max_results=10):
         
         print(f"✅ Found {len(messages)} messages")
         
-        # Fetch each email's content
+        # Fetch each email's content, up to GMAIL_BATCH_SIZE messages per HTTP round-trip
+        responses = {}
+        
+        def on_message(request_id, response, exception):
+            if exception is not None:
+                print(f"❌ Error fetching message {request_id}: {exception}")
+            else:
+                responses[request_id] = response
+        
+        for start in range(0, len(messages), GMAIL_BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=on_message)
+            for message in messages[start:start + GMAIL_BATCH_SIZE]:
+                print(f"📧 Fetching message {message['id']}")
+                batch.add(service.users().messages().get(
+                    userId='me',
+                    id=message['id'],
+                    format='full',
+                    fields=GMAIL_MESSAGE_FIELDS
+                ), request_id=message['id'])
+            batch.execute()
+        
         emails = []
         for message in messages:
-            print(f"📧 Fetching message {message['id']}")
-            msg = service.users().messages().get(
-                userId='me',
-                id=message['id'],
-                format='full'
-            ).execute()
+            msg = responses.get(message['id'])
+            if msg is None:
+                continue
             
             # Print message details for debugging
             if 'payload' in msg and 'headers' in msg['payload']:
@@ -128,25 +176,15 @@ def fetch_emails_with_label(service, label_id, max_results=10):
                     if header['name'] in ['Subject', 'Date']:
                         print(f"{header['name']}: {header['value']}")
             
-            # Get HTML content from payload
+            # Get HTML content from the shallowest text/html part
             html_content = None
-            
-            # First try to get HTML content directly from payload
-            if 'payload' in msg and msg['payload'].get('mimeType') == 'text/html':
-                data = msg['payload'].get('body', {}).get('data')
-                if data:
-                    html_content = base64.urlsafe_b64decode(data).decode('utf-8')
+            data, depth = find_html_body(msg.get('payload', {}))
+            if data:
+                html_content = base64.urlsafe_b64decode(data).decode('utf-8')
+                if depth == 0:
                     print("✅ Found HTML content in main payload")
-            
-            # If not found, look in parts
-            if not html_content and 'payload' in msg and 'parts' in msg['payload']:
-                for part in msg['payload']['parts']:
-                    if part['mimeType'] == 'text/html':
-                        data = part.get('body', {}).get('data')
-                        if data:
-                            html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-                            print("✅ Found HTML content in message parts")
-                            break
+                else:
+                    print("✅ Found HTML content in message parts")
             
             if html_content:
                 print("✅ Successfully extracted HTML content")
@@ -1,6 +1,37 @@
 import csv
+import os
+import pickle
+
+def _cache_path(filepath):
+    """Pickled copy of a ZORI CSV, stored next to it (data/zori_latest.pkl)."""
+    return os.path.splitext(filepath)[0] + '.pkl'
+
+def _load_cached(filepath, mtime_ns):
+    """Return the cached mapping if it was built from this version of the CSV."""
+    try:
+        with open(_cache_path(filepath), 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('mtime_ns') == mtime_ns:
+            return cached['data']
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        pass
+    return None
+
+def _save_cached(filepath, mtime_ns, zip_to_rent):
+    try:
+        with open(_cache_path(filepath), 'wb') as f:
+            pickle.dump({'mtime_ns': mtime_ns, 'data': zip_to_rent}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"⚠️ Could not cache rent data: {e}")
 
 def load_zori_data(filepath):
+    # The CSV only changes when a new ZORI export is downloaded, so reuse the
+    # parsed mapping until its modification time changes
+    mtime_ns = os.stat(filepath).st_mtime_ns
+    zip_to_rent = _load_cached(filepath, mtime_ns)
+    if zip_to_rent is not None:
+        return zip_to_rent
+
     zip_to_rent = {}
     with open(filepath, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -12,4 +43,5 @@ def load_zori_data(filepath):
             except ValueError:
                 rent = None
             zip_to_rent[zip_code] = rent
+    _save_cached(filepath, mtime_ns, zip_to_rent)
     return zip_to_rent
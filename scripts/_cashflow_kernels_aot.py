@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compile the numeric kernels used by modified_cashflow_analyzer.py.
+
+Numba's JIT adds import and first-call compile latency, which dominates a
+single-property CLI run. This builds a native `cashflow_kernels` extension
+module next to this script instead, so the analyzer can import it with no
+JIT cost. When the extension is missing, the analyzer falls back to its
+pure-Python implementations.
+
+Usage:
+    python scripts/_cashflow_kernels_aot.py
+"""
+
+import math
+from pathlib import Path
+
+from numba.pycc import CC
+
+from modified_cashflow_analyzer import CASHFLOW_KERNELS_VERSION
+
+# Constants
+SCRIPT_DIR = Path(__file__).parent
+
+cc = CC("cashflow_kernels")
+cc.output_dir = str(SCRIPT_DIR)
+
+
+@cc.export("kernels_version", "i8()")
+def kernels_version():
+    """Version these kernels were built from; the analyzer ignores mismatched builds."""
+    return CASHFLOW_KERNELS_VERSION
+
+
+@cc.export("mortgage_payment", "f8(f8,f8,f8)")
+def mortgage_payment(principal, annual_interest_rate_percent, loan_term_years):
+    """Monthly principal & interest payment; mirrors calculate_mortgage_payment()."""
+    if principal <= 0:
+        return 0.0
+    monthly_interest_rate = (annual_interest_rate_percent / 100) / 12
+    number_of_payments = loan_term_years * 12
+    if monthly_interest_rate == 0:
+        return principal / number_of_payments if number_of_payments > 0 else 0.0
+    return principal * monthly_interest_rate / -math.expm1(-number_of_payments * math.log1p(monthly_interest_rate))
+
+
+@cc.export("capex_total_annual", "f8(f8,f8,f8,f8[:],f8[:],f8[:])")
+def capex_total_annual(square_feet, age_multiplier, condition_multiplier, lifespans, cost_per_sqft, cost_base):
+    """Total annual CapEx reserve across all components; mirrors _capex_totals()."""
+    lifespan_factor = 1 / condition_multiplier
+    total_annual_reserve = 0.0
+    for i in range(lifespans.shape[0]):
+        adjusted_cost = (cost_per_sqft[i] * square_feet + cost_base[i]) * condition_multiplier * age_multiplier
+        total_annual_reserve += adjusted_cost / (lifespans[i] * lifespan_factor)
+    return total_annual_reserve
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"✅ Compiled cashflow_kernels into {SCRIPT_DIR}")
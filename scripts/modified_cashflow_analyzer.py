@@ -19,31 +19,49 @@ Usage:
                                         [--db-path <PATH_TO_DB>]
 """
 
-# Add debug output at the beginning
-print("DEBUG: Script starting...", flush=True)
-print("DEBUG: Importing modules...", flush=True)
-
-import argparse
+# argparse and json are imported where used, so importing this module as a
+# library doesn't pay for them
+import bisect
 import sqlite3
 import re
-import json
-import datetime
+import functools
+import logging
+import math
 import sys
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
 from pathlib import Path
 
-print(f"DEBUG: Python version: {sys.version}", flush=True)
-print(f"DEBUG: Arguments received: {sys.argv}", flush=True)
+# Debug tracing uses lazy %-style arguments, so nothing is formatted unless
+# DEBUG is enabled (via --debug when run as a script)
+log = logging.getLogger(__name__)
+if __name__ == "__main__":
+    # Configure before the import-time traces below so --debug shows them too
+    logging.basicConfig(
+        level=logging.DEBUG if "--debug" in sys.argv[1:] else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+        stream=sys.stdout
+    )
+
+log.debug("Script starting...")
+log.debug("Python version: %s", sys.version)
+log.debug("Arguments received: %s", sys.argv)
 
 # Constants
 ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
 DEFAULT_DB_PATH = ROOT / "data" / "listings.db"
 DEFAULT_CONFIG_PATH = ROOT / "config" / "cashflow_config.json"
+_CURRENT_YEAR = time.localtime().tm_year  # Computed once per process, not per row
 
-print(f"DEBUG: Script path: {__file__}", flush=True)
-print(f"DEBUG: ROOT path: {ROOT}", flush=True)
-print(f"DEBUG: Default DB path: {DEFAULT_DB_PATH}", flush=True)
-print(f"DEBUG: Default config path: {DEFAULT_CONFIG_PATH}", flush=True)
-print("DEBUG: About to define CAPEX_COMPONENTS...", flush=True)
+from lib.db_utils import ensure_indexes, has_leading_index
+
+log.debug("Script path: %s", __file__)
+log.debug("ROOT path: %s", ROOT)
+log.debug("Default DB path: %s", DEFAULT_DB_PATH)
+log.debug("Default config path: %s", DEFAULT_CONFIG_PATH)
+log.debug("About to define CAPEX_COMPONENTS...")
 
 # CapEx Components with typical lifespans and costs
 # This dictionary powers the detailed CapEx calculations
@@ -63,8 +81,43 @@ CAPEX_COMPONENTS = {
     "driveway": {"lifespan": 25, "cost_base": 3000}
 }
 
-print("DEBUG: CAPEX_COMPONENTS defined.", flush=True)
-print("DEBUG: About to define CONDITION_MULTIPLIERS...", flush=True)
+# Parallel (structure-of-arrays) view of CAPEX_COMPONENTS, built once at import.
+# Missing cost keys become 0.0 so every component is priced as per_sqft * sqft + base.
+_COMPONENT_NAMES = tuple(CAPEX_COMPONENTS)
+_LIFESPANS = tuple(float(d["lifespan"]) for d in CAPEX_COMPONENTS.values())
+_COST_PER_SQFT = tuple(float(d.get("cost_per_sqft", 0.0)) for d in CAPEX_COMPONENTS.values())
+_COST_BASE = tuple(float(d.get("cost_base", 0.0)) for d in CAPEX_COMPONENTS.values())
+
+# Native kernels built by scripts/_cashflow_kernels_aot.py; the pure-Python
+# implementations below are used when the extension hasn't been compiled, or
+# when it was built from an older version of the kernels. Bump
+# CASHFLOW_KERNELS_VERSION whenever a kernel's signature or behavior changes.
+CASHFLOW_KERNELS_VERSION = 2
+try:
+    import cashflow_kernels
+except ImportError:
+    cashflow_kernels = None
+if cashflow_kernels is not None and (
+    getattr(cashflow_kernels, "kernels_version", lambda: None)() != CASHFLOW_KERNELS_VERSION
+):
+    log.warning("Ignoring stale cashflow_kernels build; rebuild it with scripts/_cashflow_kernels_aot.py")
+    cashflow_kernels = None
+
+if cashflow_kernels is not None:
+    import numpy as np
+    _native_mortgage_payment = cashflow_kernels.mortgage_payment
+    _native_capex_total_annual = cashflow_kernels.capex_total_annual
+    # The component costs are passed to the kernel on every call rather than
+    # compiled into it, so edits to CAPEX_COMPONENTS never need a rebuild
+    _CAPEX_KERNEL_ARRAYS = tuple(
+        np.array(values, dtype=np.float64) for values in (_LIFESPANS, _COST_PER_SQFT, _COST_BASE)
+    )
+else:
+    _native_mortgage_payment = None
+    _native_capex_total_annual = None
+
+log.debug("CAPEX_COMPONENTS defined.")
+log.debug("About to define CONDITION_MULTIPLIERS...")
 
 # Property condition multipliers - affects maintenance and CapEx costs
 CONDITION_MULTIPLIERS = {
@@ -74,8 +127,8 @@ CONDITION_MULTIPLIERS = {
     "poor": 1.7        # Much higher costs for poor condition
 }
 
-print("DEBUG: CONDITION_MULTIPLIERS defined.", flush=True)
-print("DEBUG: About to define get_age_multiplier function...", flush=True)
+log.debug("CONDITION_MULTIPLIERS defined.")
+log.debug("About to define get_age_multiplier function...")
 
 # Age multipliers function - affects maintenance and CapEx costs
 def get_age_multiplier(age):
@@ -91,23 +144,47 @@ def get_age_multiplier(age):
     else:
         return 1.5    # Very old properties have much higher costs
 
-print("DEBUG: get_age_multiplier function defined.", flush=True)
-print("DEBUG: About to define load_config function...", flush=True)
+log.debug("get_age_multiplier function defined.")
+log.debug("About to define load_config function...")
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path_str):
+    """Reads and parses a JSON config file; cached by resolved path."""
+    import json
 
-def load_config(config_path):
-    """Loads configuration from a JSON file."""
     try:
-        with open(config_path, 'r') as f:
+        with open(config_path_str, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        # print(f"Info: Configuration file '{config_path}' not found. Using command-line arguments or defaults.")
+        # print(f"Info: Configuration file '{config_path_str}' not found. Using command-line arguments or defaults.")
         return {}
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from '{config_path}'. Please check its format.")
+        print(f"Error: Could not decode JSON from '{config_path_str}'. Please check its format.")
         return {} # Return empty dict to allow CLI to take precedence or error out if required args missing
 
+def load_config(config_path):
+    """Loads configuration from a JSON file."""
+    # Return a copy so callers can't mutate the cached config
+    return dict(_load_config_cached(str(Path(config_path).resolve())))
+
+def config_path_from_argv(argv):
+    """
+    Returns the --config-path value from an argument list (either
+    '--config-path PATH' or '--config-path=PATH'), or the default path.
+    """
+    for i, arg in enumerate(argv):
+        if arg == "--config-path":
+            if i + 1 < len(argv):
+                return argv[i + 1]
+            break
+        if arg.startswith("--config-path="):
+            return arg.split("=", 1)[1]
+    return str(DEFAULT_CONFIG_PATH)
+
 def parse_arguments(config):
     """Parses command-line arguments, using config for defaults."""
+    import argparse
+
     parser = argparse.ArgumentParser(description="Enhanced Real Estate Cashflow Analyzer")
     parser.add_argument(
         "--address",
@@ -214,6 +291,11 @@ def parse_arguments(config):
         default=config.get("use_dynamic_capex", False),
         help="Use detailed component-based CapEx calculations. Can be set in config. Overrides with --use-dynamic-capex or --no-use-dynamic-capex."
     )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Print debug tracing."
+    )
     parser.add_argument(
         "--capex-guide",
         action="store_true", 
@@ -234,73 +316,140 @@ def parse_arguments(config):
 
     return args
 
-def fetch_property_data(db_path, address):
-    """Fetches property data from the database by address."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# SQLite caps bound parameters at 999 on older builds, so IN (...) lookups are chunked
+SQLITE_MAX_PARAMS = 999
+
+# Covering index for the property lookup: every column selected by
+# fetch_properties_data() is stored in the index, so the query is answered
+# with a B-tree probe and never touches the table rows. It is skipped when an
+# index already leads with address (such as the one init_db.py's UNIQUE
+# constraint creates), so databases don't collect several address indexes.
+ADDRESS_COVERING_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_listings_addr_cover ON listings "
+    "(address, price, tax_information, estimated_rent, id, sqft, year_built)"
+)
+
+# Read-tuned settings for the shared lookup connection: WAL journaling with
+# relaxed syncing, in-memory temp storage, a larger page cache and mmap'd reads
+READ_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA temp_store=MEMORY; "
+    "PRAGMA cache_size=-20000; PRAGMA mmap_size=268435456;"
+)
+
+# Lookup connections kept open for the life of the process, keyed by db path
+_CONNECTIONS = {}
+
+def ensure_address_index(conn, db_path):
+    """Creates the listings address covering index unless address is already indexed."""
+    if has_leading_index(conn, "listings", "address"):
+        return
+    ensure_indexes(conn, (ADDRESS_COVERING_INDEX_SQL,), f"address index on '{db_path}'")
+
+def _get_conn(db_path):
+    """
+    Returns the shared read connection for db_path, opening and tuning it on
+    first use. The connection is switched to query_only once set up.
+    """
+    key = str(db_path)
+    conn = _CONNECTIONS.get(key)
+    if conn is None:
+        conn = sqlite3.connect(key, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.executescript(READ_CONNECTION_PRAGMAS)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not apply connection settings on '{db_path}': {e}")
+        ensure_address_index(conn, db_path)
+        conn.execute("PRAGMA query_only=1")
+        _CONNECTIONS[key] = conn
+    return conn
+
+def _process_property_row(address, property_data_row):
+    """Converts a listings row (sqlite3.Row) into the property data dictionary."""
+    db_price = property_data_row["price"]
+    db_tax_info = property_data_row["tax_information"]
+    db_rent_raw = property_data_row["estimated_rent"]
+    db_id = property_data_row["id"]
+    db_sqft_raw = property_data_row["sqft"]
+    db_year_built_raw = property_data_row["year_built"]
+
+    # Process sqft
+    processed_sqft = None
+    if db_sqft_raw is not None:
+        try:
+            val = float(db_sqft_raw)
+            if val > 0:
+                processed_sqft = val
+            else:
+                print(f"Warning: DB sqft value '{db_sqft_raw}' for address '{address}' is not positive. Sqft not used from DB.")
+        except (ValueError, TypeError):
+            print(f"Warning: DB sqft value '{db_sqft_raw}' for address '{address}' is not a valid number. Sqft not used from DB.")
+    
+    # Process year_built to calculate age
+    calculated_property_age = None
+    if db_year_built_raw:
+        try:
+            # Extract potential year using regex to handle formats like 'Built in YYYY' or just 'YYYY'
+            match = re.search(r'(\d{4})', str(db_year_built_raw))
+            if match:
+                year_built_int = int(match.group(1))
+                # Basic sanity check for the year
+                if 1800 <= year_built_int <= _CURRENT_YEAR:
+                    calculated_property_age = _CURRENT_YEAR - year_built_int
+                else:
+                    print(f"Warning: Parsed year_built '{year_built_int}' from DB value '{db_year_built_raw}' for address '{address}' is out of reasonable range. Age not calculated from DB.")
+            else:
+                print(f"Warning: Could not parse a 4-digit year from DB year_built value '{db_year_built_raw}' for address '{address}'. Age not calculated from DB.")
+        except ValueError: # Should be caught by regex, but as a safeguard
+            print(f"Warning: DB year_built value '{db_year_built_raw}' for address '{address}' could not be converted to an integer year. Age not calculated from DB.")
+    
+    return {
+        "price": db_price,
+        "tax_information_raw": db_tax_info,
+        "estimated_rent_raw": db_rent_raw,
+        "id": db_id,
+        "sqft": processed_sqft, # Use processed sqft
+        "year_built_raw": db_year_built_raw, # Store raw year_built for reference/logging
+        "calculated_property_age": calculated_property_age # Age calculated from year_built
+    }
+
+def fetch_properties_data(db_path, addresses):
+    """
+    Fetches property data for many addresses over the shared read connection.
+    Returns a dictionary mapping each found address to its property data.
+    Addresses not present in the database are omitted from the result.
+    """
+    addresses = list(dict.fromkeys(addresses))  # De-duplicate, keep order
+    results = {}
+    if not addresses:
+        return results
+
+    conn = _get_conn(db_path)
     try:
-        # Fetch price, tax_information, estimated_rent, id, sqft, and year_built
-        cursor.execute(
-            "SELECT price, tax_information, estimated_rent, id, sqft, year_built FROM listings WHERE address = ?",
-            (address,)
-        )
-        property_data_row = cursor.fetchone()
-        if property_data_row:
-            db_price = property_data_row[0]
-            db_tax_info = property_data_row[1]
-            db_rent_raw = property_data_row[2]
-            db_id = property_data_row[3]
-            db_sqft_raw = property_data_row[4]
-            db_year_built_raw = property_data_row[5]
-
-            # Process sqft
-            processed_sqft = None
-            if db_sqft_raw is not None:
-                try:
-                    val = float(db_sqft_raw)
-                    if val > 0:
-                        processed_sqft = val
-                    else:
-                        print(f"Warning: DB sqft value '{db_sqft_raw}' for address '{address}' is not positive. Sqft not used from DB.")
-                except (ValueError, TypeError):
-                    print(f"Warning: DB sqft value '{db_sqft_raw}' for address '{address}' is not a valid number. Sqft not used from DB.")
-            
-            # Process year_built to calculate age
-            calculated_property_age = None
-            if db_year_built_raw:
-                try:
-                    # Extract potential year using regex to handle formats like 'Built in YYYY' or just 'YYYY'
-                    match = re.search(r'(\d{4})', str(db_year_built_raw))
-                    if match:
-                        year_built_int = int(match.group(1))
-                        current_year = datetime.datetime.now().year
-                        # Basic sanity check for the year
-                        if 1800 <= year_built_int <= current_year:
-                            calculated_property_age = current_year - year_built_int
-                        else:
-                            print(f"Warning: Parsed year_built '{year_built_int}' from DB value '{db_year_built_raw}' for address '{address}' is out of reasonable range. Age not calculated from DB.")
-                    else:
-                        print(f"Warning: Could not parse a 4-digit year from DB year_built value '{db_year_built_raw}' for address '{address}'. Age not calculated from DB.")
-                except ValueError: # Should be caught by regex, but as a safeguard
-                    print(f"Warning: DB year_built value '{db_year_built_raw}' for address '{address}' could not be converted to an integer year. Age not calculated from DB.")
-            
-            return {
-                "price": db_price,
-                "tax_information_raw": db_tax_info,
-                "estimated_rent_raw": db_rent_raw,
-                "id": db_id,
-                "sqft": processed_sqft, # Use processed sqft
-                "year_built_raw": db_year_built_raw, # Store raw year_built for reference/logging
-                "calculated_property_age": calculated_property_age # Age calculated from year_built
-            }
-        else:
-            print(f"Error: Property with address '{address}' not found in the database.")
-            return None
+        cursor = conn.cursor()
+        for i in range(0, len(addresses), SQLITE_MAX_PARAMS):
+            chunk = addresses[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            # Fetch address, price, tax_information, estimated_rent, id, sqft, and year_built
+            cursor.execute(
+                f"SELECT address, price, tax_information, estimated_rent, id, sqft, year_built "
+                f"FROM listings WHERE address IN ({placeholders})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                address = row["address"]
+                if address not in results:  # Keep the first match, like fetchone()
+                    results[address] = _process_property_row(address, row)
     except sqlite3.Error as e:
-        print(f"Database error while fetching property data for '{address}': {e}")
-        return None
-    finally:
-        conn.close()
+        print(f"Database error while fetching property data: {e}")
+    return results
+
+def fetch_property_data(db_path, address):
+    """Fetches property data from the database by address."""
+    property_data = fetch_properties_data(db_path, [address]).get(address)
+    if property_data is None:
+        print(f"Error: Property with address '{address}' not found in the database.")
+    return property_data
 
 def parse_tax_amount(tax_info_str):
     """
@@ -324,6 +473,8 @@ def parse_tax_amount(tax_info_str):
 
 def calculate_mortgage_payment(principal, annual_interest_rate_percent, loan_term_years):
     """Calculates the monthly mortgage payment (Principal & Interest)."""
+    if _native_mortgage_payment is not None:
+        return _native_mortgage_payment(principal, annual_interest_rate_percent, loan_term_years)
     if principal <= 0:
         return 0
     
@@ -333,62 +484,202 @@ def calculate_mortgage_payment(principal, annual_interest_rate_percent, loan_ter
     if monthly_interest_rate == 0: # Avoid division by zero for 0% interest
         return principal / number_of_payments if number_of_payments > 0 else 0
 
-    m = principal * (monthly_interest_rate * (1 + monthly_interest_rate) ** number_of_payments) / \
-        ((1 + monthly_interest_rate) ** number_of_payments - 1)
+    # Annuity formula P * r / (1 - (1 + r)^-n), with (1 + r)^-n computed via
+    # log1p/expm1: one transcendental pair instead of two powers, and no
+    # cancellation for very small rates
+    m = principal * monthly_interest_rate / -math.expm1(-number_of_payments * math.log1p(monthly_interest_rate))
     return m
 
-def calculate_capex_reserves(purchase_price, square_feet, property_age, property_condition):
+def get_cost_multipliers(property_age, property_condition):
+    """Returns (age_multiplier, condition_multiplier) for maintenance and CapEx costs."""
+    return (
+        get_age_multiplier(property_age),
+        CONDITION_MULTIPLIERS.get(property_condition.lower(), 1.0)
+    )
+
+def _capex_totals(purchase_price, square_feet, age_multiplier, condition_multiplier):
     """
-    Calculates detailed CapEx reserves based on property specifics.
-    Returns a dictionary with individual component costs and total annual/monthly reserves.
+    Returns (total_annual_reserve, percent_of_value) for the CapEx components
+    without building the per-component breakdown.
     """
-    age_multiplier = get_age_multiplier(property_age)
-    condition_multiplier = CONDITION_MULTIPLIERS.get(property_condition.lower(), 1.0)
-    
-    # Calculate annual reserve for each component
+    if _native_capex_total_annual is not None:
+        total_annual_reserve = _native_capex_total_annual(
+            square_feet, age_multiplier, condition_multiplier, *_CAPEX_KERNEL_ARRAYS
+        )
+    else:
+        lifespan_factor = 1 / condition_multiplier
+        total_annual_reserve = 0
+        for lifespan, cost_per_sqft, cost_base in zip(_LIFESPANS, _COST_PER_SQFT, _COST_BASE):
+            adjusted_cost = (cost_per_sqft * square_feet + cost_base) * condition_multiplier * age_multiplier
+            total_annual_reserve += adjusted_cost / (lifespan * lifespan_factor)
+
+    # Calculate as percentage of property value for comparison
+    capex_percent_of_value = (total_annual_reserve / purchase_price) * 100 if purchase_price > 0 else 0
+    return total_annual_reserve, capex_percent_of_value
+
+def capex_component_breakdown(square_feet, age_multiplier, condition_multiplier):
+    """Returns a dictionary of replacement cost, lifespan and reserves per CapEx component."""
+    # Adjust lifespan based on condition (better condition = longer life)
+    lifespan_factor = 1 / condition_multiplier
+
     component_reserves = {}
-    total_annual_reserve = 0
-    
-    for component, details in CAPEX_COMPONENTS.items():
-        lifespan = details["lifespan"]
-        
-        # Adjust lifespan based on condition (better condition = longer life)
-        adjusted_lifespan = lifespan * (1 / condition_multiplier)
+    for component, lifespan, cost_per_sqft, cost_base in zip(
+        _COMPONENT_NAMES, _LIFESPANS, _COST_PER_SQFT, _COST_BASE
+    ):
+        adjusted_lifespan = lifespan * lifespan_factor
         
-        # Calculate replacement cost based on square footage or base cost
-        if "cost_per_sqft" in details:
-            replacement_cost = details["cost_per_sqft"] * square_feet
-            if "cost_base" in details:
-                replacement_cost += details["cost_base"]
-        else:
-            replacement_cost = details["cost_base"]
-        
-        # Apply condition and age multipliers to cost
-        adjusted_cost = replacement_cost * condition_multiplier * age_multiplier
+        # Replacement cost from square footage and/or base cost, adjusted by condition and age
+        adjusted_cost = (cost_per_sqft * square_feet + cost_base) * condition_multiplier * age_multiplier
         
         # Calculate annual reserve (replacement cost / adjusted lifespan)
         annual_reserve = adjusted_cost / adjusted_lifespan
         
-        # Store component details
         component_reserves[component] = {
             "replacement_cost": adjusted_cost,
             "lifespan_years": adjusted_lifespan,
             "annual_reserve": annual_reserve,
             "monthly_reserve": annual_reserve / 12
         }
-        
-        total_annual_reserve += annual_reserve
-    
-    # Calculate as percentage of property value for comparison
-    capex_percent_of_value = (total_annual_reserve / purchase_price) * 100 if purchase_price > 0 else 0
-    
+    return component_reserves
+
+# Column widths for the detailed CapEx breakdown table
+CAPEX_COL_COMPONENT = 24
+CAPEX_COL_REPL_COST = 18
+CAPEX_COL_LIFESPAN = 12
+CAPEX_COL_MONTHLY_RES = 18
+
+class CapexReserve(Mapping):
+    """
+    Read-only CapEx reserve summary with the same keys as calculate_capex_reserves().
+    The "components" breakdown is only built the first time it is accessed.
+    """
+    _KEYS = ("components", "total_annual", "total_monthly", "percent_of_value")
+    __slots__ = (
+        "_square_feet", "_age_multiplier", "_condition_multiplier", "_components", "_rows",
+        "total_annual", "total_monthly", "percent_of_value"
+    )
+
+    def __init__(self, purchase_price, square_feet, age_multiplier, condition_multiplier):
+        self._square_feet = square_feet
+        self._age_multiplier = age_multiplier
+        self._condition_multiplier = condition_multiplier
+        self._components = None
+        self._rows = None
+        self.total_annual, self.percent_of_value = _capex_totals(
+            purchase_price, square_feet, age_multiplier, condition_multiplier
+        )
+        self.total_monthly = self.total_annual / 12
+
+    @property
+    def components(self):
+        if self._components is None:
+            self._components = capex_component_breakdown(
+                self._square_feet, self._age_multiplier, self._condition_multiplier
+            )
+        return self._components
+
+    @property
+    def rows(self):
+        """Formatted CapEx breakdown table rows, sorted by component name."""
+        if self._rows is None:
+            rows = []
+            for component, details in sorted(self.components.items()):  # Sort for consistent order
+                component_name = component.replace('_', ' ').title()
+                repl_cost_str = f"${details['replacement_cost']:,.2f}"
+                lifespan_str = f"{details['lifespan_years']:.1f} yrs"
+                monthly_res_str = f"${details['monthly_reserve']:,.2f}"
+                rows.append(
+                    f"{component_name:<{CAPEX_COL_COMPONENT}} {repl_cost_str:>{CAPEX_COL_REPL_COST}} "
+                    f"{lifespan_str:>{CAPEX_COL_LIFESPAN}} {monthly_res_str:>{CAPEX_COL_MONTHLY_RES}}"
+                )
+            self._rows = rows
+        return self._rows
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return (f"CapexReserve(total_annual={self.total_annual!r}, "
+                f"total_monthly={self.total_monthly!r}, percent_of_value={self.percent_of_value!r})")
+
+def calculate_capex_reserves_from_mult(purchase_price, square_feet, age_multiplier, condition_multiplier):
+    """
+    Calculates detailed CapEx reserves from precomputed age and condition multipliers.
+    Returns a dictionary with individual component costs and total annual/monthly reserves.
+    """
+    total_annual_reserve, capex_percent_of_value = _capex_totals(
+        purchase_price, square_feet, age_multiplier, condition_multiplier
+    )
     return {
-        "components": component_reserves,
+        "components": capex_component_breakdown(square_feet, age_multiplier, condition_multiplier),
         "total_annual": total_annual_reserve,
         "total_monthly": total_annual_reserve / 12,
         "percent_of_value": capex_percent_of_value
     }
 
+def calculate_capex_reserves(purchase_price, square_feet, property_age, property_condition):
+    """
+    Calculates detailed CapEx reserves based on property specifics.
+    Returns a dictionary with individual component costs and total annual/monthly reserves.
+    """
+    return calculate_capex_reserves_from_mult(
+        purchase_price, square_feet, *get_cost_multipliers(property_age, property_condition)
+    )
+
+@dataclass(slots=True, frozen=True)
+class CashflowResult:
+    """
+    Financial components returned by calculate_financial_components().
+    Fields that only apply to dynamic CapEx analysis are None when it is disabled.
+    """
+    purchase_price: float
+    down_payment_amount: float
+    down_payment_percentage: float
+    loan_amount: float
+    annual_interest_rate_percent: float
+    loan_term_years: int
+    annual_insurance_cost: float
+    misc_monthly_cost: float
+    tax_info_raw: str | None
+    estimated_monthly_rent: float
+    monthly_p_and_i: float
+    annual_taxes: float | None
+    monthly_taxes: float
+    monthly_insurance: float
+    vacancy_rate_percent: float | None
+    effective_rent_after_vacancy: float
+    property_mgmt_fee_percent: float | None
+    monthly_property_mgmt: float | None
+    maintenance_percent: float | None
+    adjusted_maintenance_percent: float | None
+    monthly_maintenance: float | None
+    capex_percent: float | None
+    adjusted_capex_percent: float | None
+    monthly_capex: float | None
+    capex_reserve: CapexReserve | None
+    utilities_monthly: float | None
+    total_monthly_expenses: float
+    net_monthly_cashflow: float
+    annual_cashflow: float
+    cash_on_cash_roi: float
+    annual_noi: float | None
+    cap_rate: float | None
+    # Property specific data if using dynamic calculations
+    property_age: int | None
+    property_condition: str | None
+    square_feet: float | None
+    age_multiplier: float | None
+    condition_multiplier: float | None
+    use_dynamic_capex: bool
+
 def calculate_financial_components(
     purchase_price, 
     tax_info_raw, 
@@ -412,7 +703,7 @@ def calculate_financial_components(
     Calculates all key financial components for cashflow analysis.
 
     Returns:
-        A dictionary containing calculated financial components.
+        A CashflowResult containing calculated financial components.
         Returns None if essential data like purchase_price is missing or invalid.
     """
     if purchase_price is None or purchase_price <= 0:
@@ -460,6 +751,10 @@ def calculate_financial_components(
     # 4. Monthly Insurance
     monthly_insurance = annual_insurance_cost / 12 if annual_insurance_cost is not None else 0
     
+    # Age and condition multipliers are shared by maintenance and CapEx; compute once
+    if use_dynamic_capex:
+        age_multiplier, condition_multiplier = get_cost_multipliers(property_age, property_condition)
+    
     # 5. Vacancy loss calculation (if using enhanced features)
     if use_dynamic_capex:
         vacancy_factor = vacancy_rate_percent / 100
@@ -475,8 +770,6 @@ def calculate_financial_components(
     
     # 7. Maintenance reserve (if using enhanced features)
     if use_dynamic_capex:
-        age_multiplier = get_age_multiplier(property_age)
-        condition_multiplier = CONDITION_MULTIPLIERS.get(property_condition.lower(), 1.0)
         adjusted_maintenance_percent = maintenance_percent * age_multiplier * condition_multiplier
         monthly_maintenance = (purchase_price * (adjusted_maintenance_percent / 100)) / 12
     else:
@@ -485,15 +778,15 @@ def calculate_financial_components(
     
     # 8. CapEx reserve (if using enhanced features)
     if use_dynamic_capex:
-        # Calculate component-based CapEx
-        capex_reserve = calculate_capex_reserves(
+        # Calculate component-based CapEx; the per-component breakdown is built lazily
+        capex_reserve = CapexReserve(
             purchase_price,
             square_feet,
-            property_age,
-            property_condition
+            age_multiplier,
+            condition_multiplier
         )
-        monthly_capex = capex_reserve["total_monthly"]
-        adjusted_capex_percent = capex_reserve["percent_of_value"]
+        monthly_capex = capex_reserve.total_monthly
+        adjusted_capex_percent = capex_reserve.percent_of_value
     else:
         monthly_capex = 0
         capex_reserve = None
@@ -538,58 +831,349 @@ def calculate_financial_components(
         annual_noi = None
         cap_rate = None
     
-    return {
+    return CashflowResult(
+        purchase_price=purchase_price,
+        down_payment_amount=down_payment_amount,
+        down_payment_percentage=down_payment_percentage,
+        loan_amount=loan_amount,
+        annual_interest_rate_percent=annual_interest_rate_percent,
+        loan_term_years=loan_term_years,
+        annual_insurance_cost=annual_insurance_cost,
+        misc_monthly_cost=misc_monthly_cost,
+        tax_info_raw=tax_info_raw,
+        estimated_monthly_rent=effective_rent,
+        monthly_p_and_i=monthly_p_and_i,
+        annual_taxes=annual_taxes,
+        monthly_taxes=monthly_taxes,
+        monthly_insurance=monthly_insurance,
+        vacancy_rate_percent=vacancy_rate_percent if use_dynamic_capex else None,
+        effective_rent_after_vacancy=effective_rent_after_vacancy if use_dynamic_capex else effective_rent,
+        property_mgmt_fee_percent=property_mgmt_fee_percent if use_dynamic_capex else None,
+        monthly_property_mgmt=monthly_property_mgmt if use_dynamic_capex else None,
+        maintenance_percent=maintenance_percent if use_dynamic_capex else None,
+        adjusted_maintenance_percent=adjusted_maintenance_percent if use_dynamic_capex else None,
+        monthly_maintenance=monthly_maintenance if use_dynamic_capex else None,
+        capex_percent=capex_percent if use_dynamic_capex else None,
+        adjusted_capex_percent=adjusted_capex_percent if use_dynamic_capex else None,
+        monthly_capex=monthly_capex if use_dynamic_capex else None,
+        capex_reserve=capex_reserve,
+        utilities_monthly=utilities_monthly if use_dynamic_capex else None,
+        total_monthly_expenses=total_monthly_expenses,
+        net_monthly_cashflow=net_monthly_cashflow,
+        annual_cashflow=annual_cashflow,
+        cash_on_cash_roi=cash_on_cash_roi,
+        annual_noi=annual_noi,
+        cap_rate=cap_rate,
+        # Property specific data if using dynamic calculations
+        property_age=property_age if use_dynamic_capex else None,
+        property_condition=property_condition if use_dynamic_capex else None,
+        square_feet=square_feet if use_dynamic_capex else None,
+        age_multiplier=age_multiplier if use_dynamic_capex else None,
+        condition_multiplier=condition_multiplier if use_dynamic_capex else None,
+        use_dynamic_capex=use_dynamic_capex
+    )
+
+# Column defaults for calculate_financial_components_batch(), mirroring the
+# keyword defaults of calculate_financial_components()
+BATCH_SCENARIO_DEFAULTS = {
+    "tax_info_raw": None,
+    "estimated_monthly_rent": 0.0,
+    "annual_insurance_cost": 0.0,
+    "misc_monthly_cost": 0.0,
+    "vacancy_rate_percent": 5.0,
+    "property_mgmt_fee_percent": 0.0,
+    "maintenance_percent": 1.0,
+    "capex_percent": 1.0,
+    "utilities_monthly": 0.0,
+    "use_dynamic_capex": False,
+    "property_age": 20,
+    "property_condition": "good",
+    "square_feet": 1400,
+}
+
+def get_age_multiplier_vec(property_ages):
+    """Vectorized get_age_multiplier() over an array of property ages."""
+    import numpy as np
+
+    ages = np.asarray(property_ages, dtype=np.float64)
+    return np.select(
+        [ages <= 5, ages <= 15, ages <= 30, ages <= 50],
+        [0.6, 0.9, 1.1, 1.3],
+        default=1.5
+    )
+
+def calculate_mortgage_payment_array(principal, annual_interest_rate_percent, loan_term_years):
+    """Vectorized calculate_mortgage_payment() over arrays of loan inputs."""
+    import numpy as np
+
+    principal = np.asarray(principal, dtype=np.float64)
+    monthly_interest_rate = (np.asarray(annual_interest_rate_percent, dtype=np.float64) / 100) / 12
+    number_of_payments = np.asarray(loan_term_years, dtype=np.float64) * 12
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        amortized = principal * monthly_interest_rate / -np.expm1(-number_of_payments * np.log1p(monthly_interest_rate))
+        zero_rate = np.where(number_of_payments > 0, principal / number_of_payments, 0.0)
+    payment = np.where(monthly_interest_rate == 0, zero_rate, amortized)
+    return np.where(principal <= 0, 0.0, payment)
+
+def calculate_financial_components_batch(scenarios):
+    """
+    Vectorized calculate_financial_components() for many scenarios at once.
+
+    Args:
+        scenarios: A pandas DataFrame (or anything pandas.DataFrame() accepts,
+            such as a NumPy record array or dict of columns) with one row per
+            scenario. Columns use the keyword names of calculate_financial_components();
+            optional columns fall back to BATCH_SCENARIO_DEFAULTS.
+
+    Returns:
+        A pandas DataFrame of the numeric financial components, one row per scenario.
+        Rows with a missing or non-positive purchase price are NaN. Components that
+        only apply to dynamic CapEx are NaN for rows where it is disabled.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = pd.DataFrame(scenarios).reset_index(drop=True)
+    for column, default in BATCH_SCENARIO_DEFAULTS.items():
+        if column not in df:
+            df[column] = default
+
+    def col(name):
+        return df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    purchase_price = col("purchase_price")
+    valid = purchase_price > 0
+    dynamic = df["use_dynamic_capex"].fillna(False).to_numpy(dtype=bool)
+    rent = np.nan_to_num(col("estimated_monthly_rent"))
+    misc_monthly_cost = col("misc_monthly_cost")
+    utilities_monthly = col("utilities_monthly")
+
+    # 1. Down Payment & Loan Amount (clamped to [0, purchase_price])
+    down_payment_amount = np.clip(col("down_payment_input_dollars"), 0, purchase_price)
+    loan_amount = purchase_price - down_payment_amount
+    with np.errstate(divide="ignore", invalid="ignore"):
+        down_payment_percentage = down_payment_amount / purchase_price * 100
+
+    # 2. Monthly P&I
+    monthly_p_and_i = calculate_mortgage_payment_array(
+        loan_amount, col("annual_interest_rate_percent"), col("loan_term_years")
+    )
+
+    # 3. Monthly Taxes (tax strings are parsed per row; no vectorized equivalent)
+    annual_taxes = np.array(
+        [np.nan if (tax := parse_tax_amount(raw if isinstance(raw, str) else None)) is None else tax
+         for raw in df["tax_info_raw"]],
+        dtype=np.float64
+    )
+    monthly_taxes = np.nan_to_num(annual_taxes / 12)
+
+    # 4. Monthly Insurance
+    monthly_insurance = np.nan_to_num(col("annual_insurance_cost") / 12)
+
+    # 5-6. Vacancy loss and property management
+    effective_rent_after_vacancy = np.where(dynamic, rent * (1 - col("vacancy_rate_percent") / 100), rent)
+    monthly_property_mgmt = np.where(
+        dynamic, effective_rent_after_vacancy * (col("property_mgmt_fee_percent") / 100), 0.0
+    )
+
+    # 7. Maintenance reserve
+    age_multiplier = get_age_multiplier_vec(col("property_age"))
+    condition_multiplier = (
+        df["property_condition"].fillna("good").astype(str).str.lower()
+        .map(CONDITION_MULTIPLIERS).fillna(1.0).to_numpy(dtype=np.float64)
+    )
+    maintenance_percent = col("maintenance_percent")
+    adjusted_maintenance_percent = np.where(
+        dynamic, maintenance_percent * age_multiplier * condition_multiplier, maintenance_percent
+    )
+    monthly_maintenance = np.where(
+        dynamic, (purchase_price * (adjusted_maintenance_percent / 100)) / 12, 0.0
+    )
+
+    # 8. CapEx reserve (summed per component across all scenarios)
+    square_feet = col("square_feet")
+    lifespan_factor = 1 / condition_multiplier
+    total_annual_capex = np.zeros(len(df))
+    for lifespan, cost_per_sqft, cost_base in zip(_LIFESPANS, _COST_PER_SQFT, _COST_BASE):
+        adjusted_cost = (cost_per_sqft * square_feet + cost_base) * condition_multiplier * age_multiplier
+        total_annual_capex += adjusted_cost / (lifespan * lifespan_factor)
+    monthly_capex = np.where(dynamic, total_annual_capex / 12, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adjusted_capex_percent = np.where(dynamic, total_annual_capex / purchase_price * 100, np.nan)
+
+    # 9-10. Total Monthly Expenses and Net Monthly Cashflow
+    base_expenses = monthly_p_and_i + monthly_taxes + monthly_insurance + misc_monthly_cost
+    total_monthly_expenses = np.where(
+        dynamic,
+        base_expenses + monthly_property_mgmt + monthly_maintenance + monthly_capex + utilities_monthly,
+        base_expenses
+    )
+    net_monthly_cashflow = effective_rent_after_vacancy - total_monthly_expenses
+
+    # 11-12. Annualized returns and cap rate
+    annual_cashflow = net_monthly_cashflow * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cash_on_cash_roi = np.where(
+            down_payment_amount > 0, annual_cashflow / down_payment_amount * 100, 0.0
+        )
+        annual_noi = np.where(
+            dynamic,
+            (effective_rent_after_vacancy * 12) - (
+                (monthly_insurance + monthly_taxes + monthly_property_mgmt +
+                 monthly_maintenance + monthly_capex + utilities_monthly + misc_monthly_cost) * 12
+            ),
+            np.nan
+        )
+        cap_rate = annual_noi / purchase_price * 100
+
+    results = pd.DataFrame({
         "purchase_price": purchase_price,
         "down_payment_amount": down_payment_amount,
         "down_payment_percentage": down_payment_percentage,
         "loan_amount": loan_amount,
-        "annual_interest_rate_percent": annual_interest_rate_percent,
-        "loan_term_years": loan_term_years,
-        "annual_insurance_cost": annual_insurance_cost,
-        "misc_monthly_cost": misc_monthly_cost,
-        "tax_info_raw": tax_info_raw,
-        "estimated_monthly_rent": effective_rent,
         "monthly_p_and_i": monthly_p_and_i,
         "annual_taxes": annual_taxes,
         "monthly_taxes": monthly_taxes,
         "monthly_insurance": monthly_insurance,
-        "vacancy_rate_percent": vacancy_rate_percent if use_dynamic_capex else None,
-        "effective_rent_after_vacancy": effective_rent_after_vacancy if use_dynamic_capex else effective_rent,
-        "property_mgmt_fee_percent": property_mgmt_fee_percent if use_dynamic_capex else None,
-        "monthly_property_mgmt": monthly_property_mgmt if use_dynamic_capex else None,
-        "maintenance_percent": maintenance_percent if use_dynamic_capex else None,
-        "adjusted_maintenance_percent": adjusted_maintenance_percent if use_dynamic_capex else None,
-        "monthly_maintenance": monthly_maintenance if use_dynamic_capex else None,
-        "capex_percent": capex_percent if use_dynamic_capex else None,
-        "adjusted_capex_percent": adjusted_capex_percent if use_dynamic_capex else None,
-        "monthly_capex": monthly_capex if use_dynamic_capex else None,
-        "capex_reserve": capex_reserve,
-        "utilities_monthly": utilities_monthly if use_dynamic_capex else None,
+        "estimated_monthly_rent": rent,
+        "effective_rent_after_vacancy": effective_rent_after_vacancy,
+        "monthly_property_mgmt": np.where(dynamic, monthly_property_mgmt, np.nan),
+        "adjusted_maintenance_percent": np.where(dynamic, adjusted_maintenance_percent, np.nan),
+        "monthly_maintenance": np.where(dynamic, monthly_maintenance, np.nan),
+        "adjusted_capex_percent": adjusted_capex_percent,
+        "monthly_capex": np.where(dynamic, monthly_capex, np.nan),
         "total_monthly_expenses": total_monthly_expenses,
         "net_monthly_cashflow": net_monthly_cashflow,
         "annual_cashflow": annual_cashflow,
         "cash_on_cash_roi": cash_on_cash_roi,
         "annual_noi": annual_noi,
         "cap_rate": cap_rate,
-        # Property specific data if using dynamic calculations
-        "property_age": property_age if use_dynamic_capex else None,
-        "property_condition": property_condition if use_dynamic_capex else None,
-        "square_feet": square_feet if use_dynamic_capex else None,
-        "use_dynamic_capex": use_dynamic_capex
-    }
+        "use_dynamic_capex": dynamic,
+    }, index=df.index)
+    # Invalid purchase prices produce no result, as in the scalar function
+    numeric_columns = results.columns.drop("use_dynamic_capex")
+    results.loc[~valid, numeric_columns] = np.nan
+    return results
+
+# ANSI escape codes for the colorized terminal report
+ANSI_GREEN = '\033[92m'
+ANSI_RED = '\033[91m'
+ANSI_BOLD = '\033[1m'
+ANSI_RESET = '\033[0m'
+
+# Report rules and section titles, built once instead of per report line
+_HR80_EQ = "=" * 80
+_HR80_DASH = "-" * 80
+
+@functools.lru_cache(maxsize=None)
+def section_title(title):
+    """Returns a report section heading centered in a rule of '=' characters."""
+    padding = (80 - len(title) - 4) // 2
+    rule = "=" * padding
+    return f"\n{rule} {title} {rule}"
+
+# Deal rating labels and the ascending thresholds a value must exceed to reach
+# each label above "Poor"
+RATING_LABELS = ("Poor", "Fair", "Good", "Excellent")
+COC_RATING_THRESHOLDS = (5, 8, 12)          # Cash-on-cash return, %
+CAP_RATE_RATING_THRESHOLDS = (4, 6, 8)      # Cap rate, %
+CASHFLOW_RATING_THRESHOLDS = (100, 200, 300)  # Net monthly cashflow, $
+
+def rate_metric(value, thresholds):
+    """Returns the rating label for value; a value equal to a threshold gets the lower label."""
+    return RATING_LABELS[bisect.bisect_left(thresholds, value)]
+
+# Fixed sections of the enhanced cashflow report, filled with str.format_map
+# from the CashflowResult fields plus the display values added in
+# calculate_and_print_cashflow()
+_CASHFLOW_RESULT_FIELDS = tuple(f.name for f in fields(CashflowResult))
+_ENHANCED_REPORT_TEMPLATE = "\n".join([
+    _HR80_EQ,
+    "{bold}ENHANCED INVESTMENT PROPERTY CASHFLOW ANALYSIS{end_color}",
+    _HR80_EQ,
+    "Property: {address}",
+    "Analysis Date: {analysis_date}",
+    "Status: {profit_status}",
+    _HR80_EQ,
+    section_title("PROPERTY DETAILS"),
+    f"{'Purchase Price:':<35} ${{purchase_price:,.2f}}",
+    f"{'Square Footage:':<35} {{square_feet:.0f}} sq ft",
+    f"{'Property Age:':<35} {{property_age}} years",
+    f"{'Property Condition:':<35} {{property_condition_upper}}",
+    f"{'Down Payment:':<35} ${{down_payment_amount:,.2f}} ({{down_payment_percentage:.2f}}%)",
+    f"{'Loan Amount:':<35} ${{loan_amount:,.2f}}",
+    f"{'Interest Rate:':<35} {{annual_interest_rate_percent:.2f}}%",
+    f"{'Loan Term:':<35} {{loan_term_years}} years",
+    section_title("MONTHLY INCOME"),
+    f"{'Gross Rental Income:':<35} ${{estimated_monthly_rent:,.2f}}",
+    f"{'Vacancy Loss:':<35} ${{vacancy_loss:,.2f}} ({{vacancy_rate_percent:.2f}}%)",
+    f"{'Effective Rental Income:':<35} ${{effective_rent_after_vacancy:,.2f}}",
+    section_title("MONTHLY EXPENSES"),
+    f"{'Mortgage (P&I):':<35} ${{monthly_p_and_i:,.2f}}",
+    f"{'Property Taxes:':<35} {{property_taxes}}",
+    f"{'Insurance:':<35} ${{monthly_insurance:,.2f}}",
+    f"{'Property Management:':<35} ${{monthly_property_mgmt:,.2f}} ({{property_mgmt_fee_percent:.2f}}%)",
+    f"{'Maintenance Reserve:':<35} ${{monthly_maintenance:,.2f}} ({{adjusted_maintenance_percent:.2f}}% annual)",
+    "   - Base rate: {maintenance_percent:.2f}%",
+    "   - Adjusted by age factor: {age_multiplier:.2f}x",
+    "   - Adjusted by condition factor: {condition_multiplier:.2f}x",
+    f"{'CapEx Reserve:':<35} ${{monthly_capex:,.2f}}",
+    "   - Calculated as: {adjusted_capex_percent:.2f}% of property value",
+    "   - Based on detailed component analysis (see below)",
+    f"{'Utilities:':<35} ${{utilities_monthly:,.2f}}",
+    f"{'Miscellaneous:':<35} ${{misc_monthly_cost:,.2f}}",
+    _HR80_DASH,
+    f"{'Total Monthly Expenses:':<35} ${{total_monthly_expenses:,.2f}}",
+    section_title("CASHFLOW SUMMARY"),
+    f"{'Monthly Income:':<35} ${{effective_rent_after_vacancy:,.2f}}",
+    f"{'Monthly Expenses:':<35} ${{total_monthly_expenses:,.2f}}",
+    f"{'Net Monthly Cashflow:':<35} {{net_monthly_cashflow_str}}",
+    f"{'Annual Cashflow:':<35} {{annual_cashflow_str}}",
+    section_title("INVESTMENT METRICS"),
+    f"{'Cash-on-Cash Return:':<35} {{cash_on_cash_roi:.2f}}%",
+    f"{'Annual NOI:':<35} ${{annual_noi:,.2f}}",
+    f"{'Cap Rate:':<35} {{cap_rate:.2f}}%",
+])
+
+# Final assessment lines, from strongest to weakest, and whether each is
+# shown as positive (green) or negative (red)
+_SUMMARY_LINES = (
+    ("SUMMARY: Strong investment opportunity with good returns.", True),
+    ("SUMMARY: Decent investment with moderate returns.", True),
+    ("SUMMARY: Marginal investment. Consider negotiating better terms.", True),
+    ("SUMMARY: Negative cashflow. Not recommended as a rental investment.", False),
+)
+_SUMMARIES_PLAIN = tuple(text for text, _ in _SUMMARY_LINES)
+_SUMMARIES_COLOR = tuple(
+    f"{ANSI_GREEN if positive else ANSI_RED}{text}{ANSI_RESET}" for text, positive in _SUMMARY_LINES
+)
+
+def summary_index(cash_on_cash_roi, cap_rate, monthly_cashflow):
+    """Returns the index into the summary lines for the final deal assessment."""
+    if cash_on_cash_roi > 8 and cap_rate > 6 and monthly_cashflow > 200:
+        return 0
+    if cash_on_cash_roi > 5 and cap_rate > 4 and monthly_cashflow > 100:
+        return 1
+    if monthly_cashflow > 0:
+        return 2
+    return 3
 
 def print_capex_guide():
     """Prints detailed information about CapEx components for reference."""
-    print("DEBUG: Entering print_capex_guide function...")
-    print("\n" + "=" * 80)
-    print(f"CAPEX COMPONENTS REFERENCE GUIDE")
-    print("=" * 80)
-    print("This guide shows typical CapEx components, their default lifespans and costs.")
-    print("These values are adjusted based on property age and condition in the analysis.")
-    print("=" * 80)
-    
-    print(f"{'Component':<20} {'Typical Lifespan':<20} {'Cost Basis':<30}")
-    print("-" * 80)
+    log.debug("Entering print_capex_guide function...")
+    # Collect the guide and emit it with a single write
+    lines = [
+        "",
+        _HR80_EQ,
+        "CAPEX COMPONENTS REFERENCE GUIDE",
+        _HR80_EQ,
+        "This guide shows typical CapEx components, their default lifespans and costs.",
+        "These values are adjusted based on property age and condition in the analysis.",
+        _HR80_EQ,
+        f"{'Component':<20} {'Typical Lifespan':<20} {'Cost Basis':<30}",
+        _HR80_DASH,
+    ]
     
     for component, details in CAPEX_COMPONENTS.items():
         component_name = component.replace('_', ' ').title()
@@ -602,24 +1186,156 @@ def print_capex_guide():
         else:
             cost_basis = f"${details['cost_base']:.2f} flat fee"
             
-        print(f"{component_name:<20} {lifespan:<20} {cost_basis:<30}")
+        lines.append(f"{component_name:<20} {lifespan:<20} {cost_basis:<30}")
     
-    print("=" * 80)
-    print("PROPERTY CONDITION MULTIPLIERS")
-    print("-" * 80)
+    lines += [_HR80_EQ, "PROPERTY CONDITION MULTIPLIERS", _HR80_DASH]
     for condition, multiplier in sorted(CONDITION_MULTIPLIERS.items()):
-        print(f"{condition.title():<20} {multiplier:.2f}x")
-    
-    print("=" * 80)
-    print("AGE MULTIPLIERS")
-    print("-" * 80)
-    print(f"{'New (≤ 5 years)':<20} {0.6:.2f}x")
-    print(f"{'Newer (6-15 years)':<20} {0.9:.2f}x")
-    print(f"{'Middle-age (16-30)':<20} {1.1:.2f}x")
-    print(f"{'Older (31-50 years)':<20} {1.3:.2f}x")
-    print(f"{'Very old (>50 years)':<20} {1.5:.2f}x")
-    print("=" * 80)
-    print("DEBUG: Exiting print_capex_guide function...")
+        lines.append(f"{condition.title():<20} {multiplier:.2f}x")
+    
+    lines += [
+        _HR80_EQ,
+        "AGE MULTIPLIERS",
+        _HR80_DASH,
+        f"{'New (≤ 5 years)':<20} {0.6:.2f}x",
+        f"{'Newer (6-15 years)':<20} {0.9:.2f}x",
+        f"{'Middle-age (16-30)':<20} {1.1:.2f}x",
+        f"{'Older (31-50 years)':<20} {1.3:.2f}x",
+        f"{'Very old (>50 years)':<20} {1.5:.2f}x",
+        _HR80_EQ,
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    log.debug("Exiting print_capex_guide function...")
+
+def build_basic_report(args, property_data, financials):
+    """Returns the original-style cashflow report as a string."""
+    f = financials
+    if f.annual_taxes is not None:
+        tax_line = f"Taxes: ${f.monthly_taxes:,.2f} (derived from '{f.tax_info_raw}')"
+    else:
+        tax_line = f"Taxes: ${f.monthly_taxes:,.2f} (Warning: Could not parse tax data: '{f.tax_info_raw}')"
+
+    # Original-style output
+    return f"""
+--- Cashflow Analysis ---
+Address: {args.address}
+Property ID in DB: {property_data.get('id')}
+Database Path: {args.db_path}
+--- Inputs ---
+Purchase Price: ${f.purchase_price:,.2f}
+Down Payment: ${f.down_payment_amount:,.2f} ({f.down_payment_percentage:.2f}% of purchase price)
+Loan Amount: ${f.loan_amount:,.2f}
+Annual Interest Rate: {f.annual_interest_rate_percent:.3f}%
+Loan Term: {f.loan_term_years} years
+Estimated Annual Insurance: ${f.annual_insurance_cost:,.2f}
+Miscellaneous Monthly Costs: ${f.misc_monthly_cost:,.2f}
+Raw Tax Information from DB: '{f.tax_info_raw}'
+Raw Estimated Rent from DB: {property_data.get('estimated_rent_raw')} (used as ${f.estimated_monthly_rent:,.2f} monthly in calculation)
+--- Monthly Breakdown ---
+Principal & Interest (P&I): ${f.monthly_p_and_i:,.2f}
+{tax_line}
+Insurance: ${f.monthly_insurance:,.2f}
+Misc Costs: ${f.misc_monthly_cost:,.2f}
+Total Estimated Monthly Expenses: ${f.total_monthly_expenses:,.2f}
+--- Cashflow ---
+Estimated Monthly Rent: ${f.estimated_monthly_rent:,.2f}
+Net Estimated Monthly Cashflow: ${f.net_monthly_cashflow:,.2f}
+-------------------------
+
+"""
+
+def build_enhanced_report(args, property_data, financials, use_color=False):
+    """
+    Returns the enhanced (dynamic CapEx) cashflow report as a string.
+    ANSI colors are included only when use_color is True.
+    """
+    out = []
+    append = out.append
+
+    # Bind the fields read below to locals once
+    net_monthly_cashflow = financials.net_monthly_cashflow
+    monthly_capex = financials.monthly_capex
+    cash_on_cash_roi = financials.cash_on_cash_roi
+    cap_rate = financials.cap_rate
+    capex_reserve = financials.capex_reserve
+    
+    # Define formatting helpers
+    def format_currency(amount):
+        return f"${amount:,.2f}"
+    
+    def format_percent(amount):
+        return f"{amount:.2f}%"
+    
+    # Color codes collapse to empty strings when color is off
+    if use_color:
+        pos_color, neg_color, bold, end_color = ANSI_GREEN, ANSI_RED, ANSI_BOLD, ANSI_RESET
+    else:
+        pos_color = neg_color = bold = end_color = ""
+    
+    # Format values with color if they're positive or negative
+    def format_currency_with_color(amount):
+        formatted = format_currency(amount)
+        if amount > 0:
+            return f"{pos_color}{formatted}{end_color}"
+        elif amount < 0:
+            return f"{neg_color}{formatted}{end_color}"
+        return formatted
+    
+    # Calculate profitability status
+    is_profitable = net_monthly_cashflow > 0
+    profit_status = f"{pos_color}✓ PROFITABLE{end_color}" if is_profitable else f"{neg_color}✗ NEGATIVE CASHFLOW{end_color}"
+    
+    if financials.annual_taxes is not None:
+        property_taxes = format_currency(financials.monthly_taxes)
+    else:
+        property_taxes = f"{format_currency(financials.monthly_taxes)} (Warning: Could not parse tax data)"
+    
+    # Output the enhanced analysis: the fixed sections are one template
+    # filled from the result fields plus a few derived display values
+    values = {name: getattr(financials, name) for name in _CASHFLOW_RESULT_FIELDS}
+    values.update(
+        address=args.address,
+        analysis_date=time.strftime('%B %d, %Y'),
+        profit_status=profit_status,
+        bold=bold,
+        end_color=end_color,
+        property_condition_upper=financials.property_condition.upper(),
+        vacancy_loss=financials.estimated_monthly_rent - financials.effective_rent_after_vacancy,
+        property_taxes=property_taxes,
+        net_monthly_cashflow_str=format_currency_with_color(net_monthly_cashflow),
+        annual_cashflow_str=format_currency_with_color(financials.annual_cashflow),
+    )
+    append(_ENHANCED_REPORT_TEMPLATE.format_map(values))
+    
+    # Display detailed CapEx breakdown if using dynamic calculation
+    if capex_reserve:
+        append(section_title("DETAILED CAPEX BREAKDOWN"))
+        header = f"{'Component':<{CAPEX_COL_COMPONENT}} {'Replacement Cost':>{CAPEX_COL_REPL_COST}} {'Lifespan':>{CAPEX_COL_LIFESPAN}} {'Monthly Reserve':>{CAPEX_COL_MONTHLY_RES}}"
+        append(header)
+        append(_HR80_DASH)
+        out.extend(capex_reserve.rows)
+        append(_HR80_DASH)
+        total_monthly_capex_str = format_currency(monthly_capex)
+        append(f"{'Total Monthly CapEx Reserve:':<35} {total_monthly_capex_str}")
+    
+    # Deal Analysis Summary - Quick reference for decision making
+    append(section_title("DEAL ANALYSIS"))
+    coc_rating = rate_metric(cash_on_cash_roi, COC_RATING_THRESHOLDS)
+    cap_rating = rate_metric(cap_rate, CAP_RATE_RATING_THRESHOLDS)
+    cashflow_per_unit = net_monthly_cashflow  # For multi-unit, you'd divide by # of units
+    cashflow_rating = rate_metric(cashflow_per_unit, CASHFLOW_RATING_THRESHOLDS)
+    
+    append(f"{'Cash-on-Cash Rating:':<35} {coc_rating} ({format_percent(cash_on_cash_roi)})")
+    append(f"{'Cap Rate Rating:':<35} {cap_rating} ({format_percent(cap_rate)})")
+    append(f"{'Cashflow Rating:':<35} {cashflow_rating} ({format_currency(cashflow_per_unit)}/month)")
+    
+    # Final assessment
+    append(_HR80_EQ)
+    summaries = _SUMMARIES_COLOR if use_color else _SUMMARIES_PLAIN
+    append(summaries[summary_index(cash_on_cash_roi, cap_rate, cashflow_per_unit)])
+    
+    append(_HR80_EQ)
+
+    return "\n".join(out) + "\n"
 
 def calculate_and_print_cashflow(args, property_data):
     """Calculates and prints the cashflow analysis using calculate_financial_components."""
@@ -643,22 +1359,22 @@ def calculate_and_print_cashflow(args, property_data):
     db_sqft_value = property_data.get("sqft")
     if db_sqft_value is not None: # This implies it was valid when processed in fetch_property_data
         actual_square_feet = db_sqft_value
-        print(f"DEBUG: Using square footage from DB: {actual_square_feet:.0f}", flush=True)
+        log.debug("Using square footage from DB: %.0f", actual_square_feet)
     else:
         # This implies sqft was NULL in DB, or had an invalid value (e.g. non-positive, non-numeric)
         # Warnings for invalid DB values are printed in fetch_property_data
-        print(f"DEBUG: Square footage not found or invalid in DB for property. Using value from arguments/config: {args.square_feet:.0f}", flush=True)
+        log.debug("Square footage not found or invalid in DB for property. Using value from arguments/config: %.0f", args.square_feet)
 
     # Property Age
     actual_property_age = args.property_age # Default to arg
     db_calculated_age = property_data.get("calculated_property_age")
     if db_calculated_age is not None: # This implies year_built was present and resulted in a valid age
         actual_property_age = db_calculated_age
-        print(f"DEBUG: Using property age calculated from DB (Year Built: {property_data.get('year_built_raw', 'N/A')}): {actual_property_age} years", flush=True)
+        log.debug("Using property age calculated from DB (Year Built: %s): %s years", property_data.get('year_built_raw', 'N/A'), actual_property_age)
     else:
         # This implies year_built was missing, unparseable, or resulted in an invalid age
         # Warnings for these cases are printed in fetch_property_data
-        print(f"DEBUG: Property age not calculated from DB (Year Built from DB: '{property_data.get('year_built_raw', 'N/A')}'). Using value from arguments/config: {args.property_age} years", flush=True)
+        log.debug("Property age not calculated from DB (Year Built from DB: '%s'). Using value from arguments/config: %s years", property_data.get('year_built_raw', 'N/A'), args.property_age)
 
     # Handle case where estimated_rent_raw might be None
     # The calculation function also has a default, but good to be explicit
@@ -690,223 +1406,24 @@ def calculate_and_print_cashflow(args, property_data):
         # Error message already printed by calculate_financial_components or preceding checks
         return
 
-    # --------------------------------------------------------------
-    # Basic output (similar to original script) when not using dynamic CapEx
-    # --------------------------------------------------------------
-    if not args.use_dynamic_capex:
-        # Original-style output
-        print("\n--- Cashflow Analysis ---")
-        print(f"Address: {args.address}")
-        print(f"Property ID in DB: {property_data.get('id')}") 
-        print(f"Database Path: {args.db_path}")
-        print("--- Inputs ---")
-        print(f"Purchase Price: ${financials['purchase_price']:,.2f}")
-        print(f"Down Payment: ${financials['down_payment_amount']:,.2f} ({financials['down_payment_percentage']:.2f}% of purchase price)")
-        print(f"Loan Amount: ${financials['loan_amount']:,.2f}")
-        print(f"Annual Interest Rate: {financials['annual_interest_rate_percent']:.3f}%")
-        print(f"Loan Term: {financials['loan_term_years']} years")
-        print(f"Estimated Annual Insurance: ${financials['annual_insurance_cost']:,.2f}")
-        print(f"Miscellaneous Monthly Costs: ${financials['misc_monthly_cost']:,.2f}")
-        print(f"Raw Tax Information from DB: '{financials['tax_info_raw']}'")
-        print(f"Raw Estimated Rent from DB: {property_data.get('estimated_rent_raw')} (used as ${financials['estimated_monthly_rent']:,.2f} monthly in calculation)")
-
-        print("--- Monthly Breakdown ---")
-        print(f"Principal & Interest (P&I): ${financials['monthly_p_and_i']:,.2f}")
-        
-        if financials['annual_taxes'] is not None:
-            print(f"Taxes: ${financials['monthly_taxes']:,.2f} (derived from '{financials['tax_info_raw']}')")
-        else:
-            print(f"Taxes: ${financials['monthly_taxes']:,.2f} (Warning: Could not parse tax data: '{financials['tax_info_raw']}')")
-
-        print(f"Insurance: ${financials['monthly_insurance']:,.2f}")
-        print(f"Misc Costs: ${financials['misc_monthly_cost']:,.2f}")
-        print(f"Total Estimated Monthly Expenses: ${financials['total_monthly_expenses']:,.2f}")
-        
-        print("--- Cashflow ---")
-        print(f"Estimated Monthly Rent: ${financials['estimated_monthly_rent']:,.2f}") # Use the value from financials dict
-        print(f"Net Estimated Monthly Cashflow: ${financials['net_monthly_cashflow']:,.2f}")
-        print("-------------------------\n")
-        
-    # --------------------------------------------------------------
-    # Enhanced output when using dynamic CapEx
-    # --------------------------------------------------------------
+    if args.use_dynamic_capex:
+        # Use color only when stdout is a terminal; replacement streams
+        # without isatty() are treated as non-terminals
+        use_color = getattr(sys.stdout, "isatty", lambda: False)()
+        report = build_enhanced_report(args, property_data, financials, use_color)
     else:
-        # Define formatting helpers
-        def hr(char='=', length=80):
-            return char * length
-        
-        def section_title(title):
-            padding = (80 - len(title) - 4) // 2
-            return f"\n{hr('=', padding)} {title} {hr('=', padding)}"
-        
-        def format_currency(amount):
-            return f"${amount:,.2f}"
-        
-        def format_percent(amount):
-            return f"{amount:.2f}%"
-        
-        def format_label_value(label, value, width=35):
-            return f"{label:<{width}} {value}"
-        
-        # Try to determine if terminal supports color
-        use_color = True
-        try:
-            import os
-            use_color = os.isatty(1)  # Check if stdout is a terminal
-        except:
-            use_color = False
-        
-        pos_color = '\033[92m'  # Green
-        neg_color = '\033[91m'  # Red
-        bold = '\033[1m'
-        end_color = '\033[0m'
-        
-        def colorize(text, color_code):
-            if use_color:
-                return f"{color_code}{text}{end_color}"
-            return text
-        
-        # Format values with color if they're positive or negative
-        def format_currency_with_color(amount):
-            formatted = format_currency(amount)
-            if amount > 0:
-                return colorize(formatted, pos_color)
-            elif amount < 0:
-                return colorize(formatted, neg_color)
-            return formatted
-        
-        # Calculate profitability status
-        is_profitable = financials['net_monthly_cashflow'] > 0
-        profit_status = colorize("✓ PROFITABLE", pos_color) if is_profitable else colorize("✗ NEGATIVE CASHFLOW", neg_color)
-        
-        # Output the enhanced analysis
-        print(hr())
-        print(colorize(f"ENHANCED INVESTMENT PROPERTY CASHFLOW ANALYSIS", bold))
-        print(hr())
-        print(f"Property: {args.address}")
-        print(f"Analysis Date: {datetime.datetime.now().strftime('%B %d, %Y')}")
-        print(f"Status: {profit_status}")
-        print(hr())
-        
-        print(section_title("PROPERTY DETAILS"))
-        print(format_label_value("Purchase Price:", format_currency(financials['purchase_price'])))
-        print(format_label_value("Square Footage:", f"{financials['square_feet']:.0f} sq ft"))
-        print(format_label_value("Property Age:", f"{financials['property_age']} years"))
-        print(format_label_value("Property Condition:", financials['property_condition'].upper()))
-        print(format_label_value("Down Payment:", f"{format_currency(financials['down_payment_amount'])} ({format_percent(financials['down_payment_percentage'])})"))
-        print(format_label_value("Loan Amount:", format_currency(financials['loan_amount'])))
-        print(format_label_value("Interest Rate:", format_percent(financials['annual_interest_rate_percent'])))
-        print(format_label_value("Loan Term:", f"{financials['loan_term_years']} years"))
-        
-        print(section_title("MONTHLY INCOME"))
-        print(format_label_value("Gross Rental Income:", format_currency(financials['estimated_monthly_rent'])))
-        print(format_label_value("Vacancy Loss:", f"{format_currency(financials['estimated_monthly_rent'] - financials['effective_rent_after_vacancy'])} ({format_percent(financials['vacancy_rate_percent'])})"))
-        print(format_label_value("Effective Rental Income:", format_currency(financials['effective_rent_after_vacancy'])))
-        
-        print(section_title("MONTHLY EXPENSES"))
-        print(format_label_value("Mortgage (P&I):", format_currency(financials['monthly_p_and_i'])))
-        
-        if financials['annual_taxes'] is not None:
-            print(format_label_value("Property Taxes:", format_currency(financials['monthly_taxes'])))
-        else:
-            tax_warning = f"{format_currency(financials['monthly_taxes'])} (Warning: Could not parse tax data)"
-            print(format_label_value("Property Taxes:", tax_warning))
-        
-        print(format_label_value("Insurance:", format_currency(financials['monthly_insurance'])))
-        print(format_label_value("Property Management:", f"{format_currency(financials['monthly_property_mgmt'])} ({format_percent(financials['property_mgmt_fee_percent'])})"))
-        
-        # Maintenance reserve details
-        print(format_label_value("Maintenance Reserve:", f"{format_currency(financials['monthly_maintenance'])} ({format_percent(financials['adjusted_maintenance_percent'])} annual)"))
-        print(f"   - Base rate: {format_percent(financials['maintenance_percent'])}")
-        print(f"   - Adjusted by age factor: {get_age_multiplier(financials['property_age']):.2f}x")
-        print(f"   - Adjusted by condition factor: {CONDITION_MULTIPLIERS[financials['property_condition']]:.2f}x")
-        
-        # CapEx reserve details
-        print(format_label_value("CapEx Reserve:", f"{format_currency(financials['monthly_capex'])}"))
-        print(f"   - Calculated as: {format_percent(financials['adjusted_capex_percent'])} of property value")
-        print(f"   - Based on detailed component analysis (see below)")
-        
-        print(format_label_value("Utilities:", format_currency(financials['utilities_monthly'])))
-        print(format_label_value("Miscellaneous:", format_currency(financials['misc_monthly_cost'])))
-        print(hr('-'))
-        print(format_label_value("Total Monthly Expenses:", format_currency(financials['total_monthly_expenses'])))
-        
-        print(section_title("CASHFLOW SUMMARY"))
-        print(format_label_value("Monthly Income:", format_currency(financials['effective_rent_after_vacancy'])))
-        print(format_label_value("Monthly Expenses:", format_currency(financials['total_monthly_expenses'])))
-        print(format_label_value("Net Monthly Cashflow:", format_currency_with_color(financials['net_monthly_cashflow'])))
-        print(format_label_value("Annual Cashflow:", format_currency_with_color(financials['annual_cashflow'])))
-        
-        print(section_title("INVESTMENT METRICS"))
-        print(format_label_value("Cash-on-Cash Return:", format_percent(financials['cash_on_cash_roi'])))
-        print(format_label_value("Annual NOI:", format_currency(financials['annual_noi'])))
-        print(format_label_value("Cap Rate:", format_percent(financials['cap_rate'])))
-        
-        # Display detailed CapEx breakdown if using dynamic calculation
-        if financials['capex_reserve']:
-            print(section_title("DETAILED CAPEX BREAKDOWN"))
-            # Define column widths for the CapEx table
-            col_component = 24
-            col_repl_cost = 18
-            col_lifespan = 12
-            col_monthly_res = 18
-
-            header = f"{'Component':<{col_component}} {'Replacement Cost':>{col_repl_cost}} {'Lifespan':>{col_lifespan}} {'Monthly Reserve':>{col_monthly_res}}"
-            print(header)
-            print(hr('-'))
-            capex_components = financials['capex_reserve']['components']
-            for component, details in sorted(capex_components.items()): # Sort for consistent order
-                component_name = component.replace('_', ' ').title()
-                repl_cost_str = format_currency(details['replacement_cost'])
-                lifespan_str = f"{details['lifespan_years']:.1f} yrs"
-                monthly_res_str = format_currency(details['monthly_reserve'])
-                print(f"{component_name:<{col_component}} {repl_cost_str:>{col_repl_cost}} {lifespan_str:>{col_lifespan}} {monthly_res_str:>{col_monthly_res}}")
-            print(hr('-'))
-            total_monthly_capex_str = format_currency(financials['monthly_capex'])
-            print(format_label_value("Total Monthly CapEx Reserve:", total_monthly_capex_str))
-        
-        # Deal Analysis Summary - Quick reference for decision making
-        print(section_title("DEAL ANALYSIS"))
-        coc_rating = "Excellent" if financials['cash_on_cash_roi'] > 12 else "Good" if financials['cash_on_cash_roi'] > 8 else "Fair" if financials['cash_on_cash_roi'] > 5 else "Poor"
-        cap_rating = "Excellent" if financials['cap_rate'] > 8 else "Good" if financials['cap_rate'] > 6 else "Fair" if financials['cap_rate'] > 4 else "Poor"
-        cashflow_per_unit = financials['net_monthly_cashflow']  # For multi-unit, you'd divide by # of units
-        cashflow_rating = "Excellent" if cashflow_per_unit > 300 else "Good" if cashflow_per_unit > 200 else "Fair" if cashflow_per_unit > 100 else "Poor"
-        
-        print(format_label_value("Cash-on-Cash Rating:", f"{coc_rating} ({format_percent(financials['cash_on_cash_roi'])})"))
-        print(format_label_value("Cap Rate Rating:", f"{cap_rating} ({format_percent(financials['cap_rate'])})"))
-        print(format_label_value("Cashflow Rating:", f"{cashflow_rating} ({format_currency(cashflow_per_unit)}/month)"))
-        
-        # Final assessment
-        print(hr())
-        if financials['cash_on_cash_roi'] > 8 and financials['cap_rate'] > 6 and cashflow_per_unit > 200:
-            print(colorize("SUMMARY: Strong investment opportunity with good returns.", pos_color))
-        elif financials['cash_on_cash_roi'] > 5 and financials['cap_rate'] > 4 and cashflow_per_unit > 100:
-            print(colorize("SUMMARY: Decent investment with moderate returns.", pos_color))
-        elif financials['net_monthly_cashflow'] > 0:
-            print(colorize("SUMMARY: Marginal investment. Consider negotiating better terms.", pos_color))
-        else:
-            print(colorize("SUMMARY: Negative cashflow. Not recommended as a rental investment.", neg_color))
-        
-        print(hr())
+        report = build_basic_report(args, property_data, financials)
+    sys.stdout.write(report)
+
 
 if __name__ == "__main__":
-    print("DEBUG: Script __main__ block started.", flush=True)
-
-    # Initial, minimal parsing to get config_path.
-    # This allows the config file to influence other argument defaults.
-    # We use add_help=False to avoid conflicts with the main parser later.
-    temp_parser = argparse.ArgumentParser(add_help=False) 
-    temp_parser.add_argument(
-        "--config-path", 
-        default=str(DEFAULT_CONFIG_PATH), 
-        type=str,
-        help="Path to the JSON configuration file." # Help text for completeness
-    )
-    # Parse only known args to avoid errors if other required args are missing at this stage
-    known_args, _ = temp_parser.parse_known_args() 
-    
-    actual_config_path = Path(known_args.config_path)
-    print(f"DEBUG: Determined config path to use for loading defaults: {actual_config_path}", flush=True)
+    log.debug("Script __main__ block started.")
+
+    # Initial, minimal scan to get config_path.
+    # This allows the config file to influence other argument defaults
+    # without building a second ArgumentParser just for this one option.
+    actual_config_path = Path(config_path_from_argv(sys.argv[1:]))
+    log.debug("Determined config path to use for loading defaults: %s", actual_config_path)
     
     # Load the configuration using the determined path
     config = load_config(actual_config_path)
@@ -914,40 +1431,40 @@ if __name__ == "__main__":
         print(f"Warning: Specified config file '{actual_config_path}' was not found or is invalid. Trying default config.")
         config = load_config(DEFAULT_CONFIG_PATH)
         if config:
-            print(f"DEBUG: Successfully loaded default config from '{DEFAULT_CONFIG_PATH}': {config}", flush=True)
+            log.debug("Successfully loaded default config from '%s': %s", DEFAULT_CONFIG_PATH, config)
         else:
-            print(f"DEBUG: Default config '{DEFAULT_CONFIG_PATH}' also not found or invalid. Proceeding with empty config.", flush=True)
+            log.debug("Default config '%s' also not found or invalid. Proceeding with empty config.", DEFAULT_CONFIG_PATH)
             config = {} # Ensure config is a dict
     elif not config and actual_config_path == DEFAULT_CONFIG_PATH:
-         print(f"DEBUG: Default config file '{actual_config_path}' not found or invalid. Proceeding with empty config.", flush=True)
+         log.debug("Default config file '%s' not found or invalid. Proceeding with empty config.", actual_config_path)
          config = {} # Ensure config is a dict
     else:
-        print(f"DEBUG: Config loaded successfully from '{actual_config_path}': {config}", flush=True)
+        log.debug("Config loaded successfully from '%s': %s", actual_config_path, config)
 
     # Now parse all arguments. The 'parse_arguments' function will use the
     # 'config' dictionary (loaded above) to set default values for arguments.
     args = parse_arguments(config) 
-    print(f"DEBUG: Arguments parsed: {args}", flush=True)
-    print(f"DEBUG: Using effective config path for operations: {args.config_path}", flush=True)
-    print(f"DEBUG: use_dynamic_capex set to: {args.use_dynamic_capex}", flush=True)
+    log.debug("Arguments parsed: %s", args)
+    log.debug("Using effective config path for operations: %s", args.config_path)
+    log.debug("use_dynamic_capex set to: %s", args.use_dynamic_capex)
 
 
     if args.capex_guide:
-        print("DEBUG: --capex-guide flag detected. Printing guide.", flush=True)
+        log.debug("--capex-guide flag detected. Printing guide.")
         print_capex_guide()
         sys.exit(0) # Normal exit after printing guide
 
-    print(f"DEBUG: Fetching property data for address: '{args.address}' from DB: '{args.db_path}'", flush=True)
+    log.debug("Fetching property data for address: '%s' from DB: '%s'", args.address, args.db_path)
     property_data = fetch_property_data(args.db_path, args.address)
 
     if property_data:
-        print(f"DEBUG: Property data fetched: {property_data}", flush=True)
-        print("DEBUG: Calling calculate_and_print_cashflow...", flush=True)
+        log.debug("Property data fetched: %s", property_data)
+        log.debug("Calling calculate_and_print_cashflow...")
         calculate_and_print_cashflow(args, property_data)
-        print("DEBUG: calculate_and_print_cashflow finished.", flush=True)
+        log.debug("calculate_and_print_cashflow finished.")
     else:
         # Error message is printed by fetch_property_data if address not found
-        print(f"DEBUG: Main block: Failed to fetch property data for address '{args.address}'. Script will exit.", flush=True)
+        log.debug("Main block: Failed to fetch property data for address '%s'. Script will exit.", args.address)
         sys.exit(1) # Exit if property data is not found
 
-    print("DEBUG: Script finished successfully.", flush=True)
\ No newline at end of file
+    log.debug("Script finished successfully.")
\ No newline at end of file
@@ -15,20 +15,33 @@ Options:
     --credentials PATH  Path to credentials.json file (default: project_root/credentials.json)
     --token PATH        Path to token.pickle file (default: project_root/token.pickle)
     --force             Force reprocessing of all emails
+    --verbose           Print details for every parsed listing and per-message progress
 """
 
 import os
 import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import Optional
 import re
 import json
+import logging
 import argparse
 import html
-from bs4 import BeautifulSoup
+import io
+from lxml import etree
 import usaddress
 import sqlite3
 from pathlib import Path
 import base64
 
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib json module is the fallback
+    orjson = None
+
 # Add project root to path
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
@@ -36,274 +49,413 @@ sys.path.insert(0, str(ROOT))
 # Define database path
 DB_PATH = ROOT / "data" / "listings.db"
 
+_HTML_PART_LOCATIONS = ("main payload", "message parts", "nested parts")
+
+# Parsed listings are cached per Gmail message id so re-runs skip fetching and
+# parsing emails seen before; bump the version when the parser output changes
+PARSED_CACHE_DIR = ROOT / ".cache" / "parsed_emails"
+PARSED_CACHE_VERSION = 1
+
+# Labels are fetched in parallel, bounded by this many worker threads
+MAX_LABEL_WORKERS = 8
+# How often a blocked email producer rechecks whether its consumer has stopped
+PRODUCER_PUT_TIMEOUT = 0.5
+
+# Listing field patterns. Each named group captures that field's raw value;
+# all of them are scanned in one pass per div/span (see _scan_listing_fields).
+_PRICE_RE = re.compile(r"\$[\d,]+")
+_FIELD_PATTERNS = (
+    r"(?P<price>\$[\d,]+)",
+    r"(?P<beds>\d+(?:\.\d+)?)\s*BD",
+    r"(?P<baths>\d+(?:\.\d+)?)\s*BA",
+    r"(?P<sqft>[\d,]+)\s*Sq\.Ft\.",
+    r"MLS#\s*(?P<mls_number>[A-Z0-9-]+)",
+    r"MLS Type:\s*(?P<mls_type>[^,\n]+)",
+    r"Taxes:\s*(?P<tax_information>[^,\n]+)",
+    r"Days on Market:\s*(?P<days_on_compass>\d+)",
+    r"Last Updated:\s*(?P<last_updated>[\d/]+)",
+)
+# Wrapped in a lookahead so matches may overlap: every field still sees its
+# leftmost match, exactly as a separate re.search() per field would.
+_COLLECTION_FIELD_RE = re.compile("(?=" + "|".join(_FIELD_PATTERNS) + ")")
+# Individual emails take the price from the <b> tag, not from the spans
+_SPAN_FIELD_RE = re.compile("(?=" + "|".join(_FIELD_PATTERNS[1:]) + ")")
+_LISTING_FIELDS = tuple(_COLLECTION_FIELD_RE.groupindex)
+_SPAN_FIELDS = tuple(_SPAN_FIELD_RE.groupindex)
+# Deletes the "$" and thousands separators from price/sqft text in one pass
+_NUMBER_PUNCTUATION = str.maketrans("", "", "$,")
+def _room_count(value):
+    """Beds/baths as an int; only fractional counts like "2.5" go through float."""
+    return int(value) if "." not in value else int(round(float(value)))
+
+_FIELD_CONVERTERS = {
+    "price": lambda v: int(v.translate(_NUMBER_PUNCTUATION)),
+    "beds": _room_count,
+    "baths": _room_count,
+    "sqft": lambda v: int(v.translate(_NUMBER_PUNCTUATION)),
+    "mls_number": str.strip,
+    "mls_type": str.strip,
+    "tax_information": str.strip,
+    "days_on_compass": int,
+    "last_updated": str,
+}
+
+# One connection serves every label worker; _db_lock serializes its use
+DB_CONNECTION_PRAGMAS = "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+_db_connection = None
+_db_lock = threading.RLock()
+_processed_lock = threading.Lock()
+
+# Per-message progress goes through logging at DEBUG, so normal runs skip
+# formatting it; --verbose turns it on
+log = logging.getLogger(__name__)
+
+_thread_state = threading.local()
+_print_lock = threading.Lock()
+
+def _locked_print(*args, **kwargs):
+    """print() for code running on label worker threads, so their lines don't interleave."""
+    with _print_lock:
+        print(*args, **kwargs)
+
 # Import project modules
-from lib.gmail_utils import authenticate_gmail
+from lib.gmail_utils import authenticate_gmail, find_html_body, GMAIL_BATCH_SIZE, GMAIL_MESSAGE_FIELDS
 from lib.zori_utils import load_zori_data
 from lib.db_utils import insert_listings
 
 # Email parsing functions
+
+# usaddress components that make up the street line, in order
+_STREET_KEYS = (
+    "AddressNumber",
+    "StreetNamePreType",
+    "StreetName",
+    "StreetNamePostType",
+    "OccupancyType",
+    "OccupancyIdentifier",
+)
+
+# Parsed addresses, keyed by the full address string. The same listing often
+# reappears across emails, labels and runs, so the cache is saved between runs.
+# It keeps the ADDRESS_CACHE_MAX_ENTRIES most recently used addresses, in
+# least-recently-used-first order; failed parses are never cached.
+ADDRESS_CACHE_PATH = ROOT / ".cache" / "addresses.json"
+ADDRESS_CACHE_VERSION = 2
+ADDRESS_CACHE_MAX_ENTRIES = 4096
+_address_cache = {}
+_address_cache_lock = threading.Lock()
+
+def _remember_address(full_address, components):
+    """Store components as the most recently used entry, evicting the oldest."""
+    with _address_cache_lock:
+        _address_cache.pop(full_address, None)
+        _address_cache[full_address] = components
+        while len(_address_cache) > ADDRESS_CACHE_MAX_ENTRIES:
+            del _address_cache[next(iter(_address_cache))]
+
+def load_address_cache():
+    """Load addresses parsed by earlier runs into the in-memory cache."""
+    try:
+        cached = _read_json(ADDRESS_CACHE_PATH)
+        if cached.get("version") != ADDRESS_CACHE_VERSION:
+            return
+        entries = [(address, tuple(parts)) for address, parts in cached["addresses"].items()]
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        # Missing, unreadable or unexpectedly shaped cache; start empty
+        return
+    for address, components in entries:
+        _remember_address(address, components)
+
+def save_address_cache():
+    """Save the in-memory address cache for the next run."""
+    try:
+        ADDRESS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with _address_cache_lock:
+            addresses = dict(_address_cache)
+        _write_json(ADDRESS_CACHE_PATH, {"version": ADDRESS_CACHE_VERSION, "addresses": addresses})
+    except OSError as e:
+        print(f"⚠️ Could not save address cache: {e}")
+
 def parse_address_components(full_address):
     """Parse a full address into its components using usaddress library."""
+    with _address_cache_lock:
+        cached = _address_cache.get(full_address)
+    if cached is not None:
+        _remember_address(full_address, cached)
+        return cached
     try:
         parsed = usaddress.tag(full_address)[0]
-        street_parts = [
-            parsed.get("AddressNumber", ""),
-            parsed.get("StreetNamePreType", ""),
-            parsed.get("StreetName", ""),
-            parsed.get("StreetNamePostType", ""),
-            parsed.get("OccupancyType", ""),
-            parsed.get("OccupancyIdentifier", "")
-        ]
-        street = " ".join(filter(None, street_parts)).strip()
+        street = " ".join(part for key in _STREET_KEYS if (part := parsed.get(key)))
         city = parsed.get("PlaceName", "")
         state = parsed.get("StateName", "")
         zip_code = parsed.get("ZipCode", "")
-        return street, city, state, zip_code
+        components = street, city, state, zip_code
     except Exception as e:
-        print(f"⚠️ Address parsing error: {e}")
+        _locked_print(f"⚠️ Address parsing error: {e}")
+        # Not cached, so the address is parsed again next time
         return full_address, "", "", ""
+    _remember_address(full_address, components)
+    return components
 
 def parse_html_email(html_content):
-    """Parse HTML email content to extract real estate listings."""
-    soup = BeautifulSoup(html.unescape(html_content), "html.parser")
-    listings = []
-    
-    # Try to parse as a collection email first
-    collection_listings = parse_collection_format(soup)
-    if collection_listings:
-        for listing in collection_listings:
-            listing["from_collection"] = True
-        return collection_listings
-    
-    # Fall back to individual listing format
-    individual_listings = parse_individual_format(soup)
-    for listing in individual_listings:
-        listing["from_collection"] = False
-    
-    return individual_listings
-
-def parse_collection_format(soup):
-    """Parse emails with a collection of listings (multiple properties)."""
-    listings = []
-    
-    for row in soup.find_all("tr", class_="listingComponentV2"):
-        a_tag = row.find("a", href=True)
-        href = a_tag["href"] if a_tag else None
-        
-        # Extract base Compass URL without workspace parameters
-        if href and "compass.com/listing" in href:
-            # Extract just the base URL up to the listing ID
-            url_parts = href.split("?")[0]
-            href = url_parts
-        
-        next_tr = row.find_next_sibling("tr")
-        if not next_tr:
-            continue
-            
-        full_address, price, beds, baths, sqft = None, None, None, None, None
-        city, state, zip_code = None, None, None
-        tax_information, mls_type, mls_number = None, None, None
-        days_on_compass, last_updated = None, None
-        
-        for div in next_tr.find_all("div"):
-            text = div.get_text(" ", strip=True)
-            
-            if not full_address:
-                a = div.find("a")
-                if a and "," in a.get_text(strip=True):
-                    full_address = a.get_text(strip=True)
-                    street_address, city, state, zip_code = parse_address_components(full_address)
-                    
-            if "$" in text and not price:
-                m = re.search(r"\$[\d,]+", text)
-                if m:
-                    price = int(m.group(0).replace("$", "").replace(",", ""))
-                    
-            # More specific matching for beds
-            if "BD" in text and not beds:
-                m = re.search(r"(\d+(?:\.\d+)?)\s*BD", text)
-                if m:
-                    beds = int(round(float(m.group(1))))
-            # More specific matching for baths
-            if "BA" in text and not baths:
-                m = re.search(r"(\d+(?:\.\d+)?)\s*BA", text)
-                if m:
-                    baths = int(round(float(m.group(1))))
-            # More specific matching for sqft
-            if "Sq.Ft." in text and not sqft:
-                m = re.search(r"([\d,]+)\s*Sq\.Ft\.", text)
-                if m:
-                    sqft = int(m.group(1).replace(",", ""))
-            
-            # Extract MLS number
-            if "MLS#" in text and not mls_number:
-                m = re.search(r"MLS#\s*([A-Z0-9-]+)", text)
-                if m:
-                    mls_number = m.group(1).strip()
-            
-            # Extract MLS type
-            if "MLS Type:" in text and not mls_type:
-                m = re.search(r"MLS Type:\s*([^,\n]+)", text)
-                if m:
-                    mls_type = m.group(1).strip()
-            
-            # Extract tax information
-            if "Taxes:" in text and not tax_information:
-                m = re.search(r"Taxes:\s*([^,\n]+)", text)
-                if m:
-                    tax_information = m.group(1).strip()
-            
-            # Extract days on compass
-            if "Days on Market:" in text and not days_on_compass:
-                m = re.search(r"Days on Market:\s*(\d+)", text)
-                if m:
-                    days_on_compass = int(m.group(1))
-            
-            # Extract last updated date
-            if "Last Updated:" in text and not last_updated:
-                m = re.search(r"Last Updated:\s*([\d/]+)", text)
-                if m:
-                    last_updated = m.group(1)
-                    
-        if href and full_address:
-            listing = {
-                "address": street_address,
-                "url": href,
-                "price": price,
-                "beds": beds,
-                "baths": baths,
-                "sqft": sqft,
-                "price_per_sqft": int(price / sqft) if price and sqft else None,
-                "city": city,
-                "state": state,
-                "zip": zip_code,
-                "estimated_rent": None,
-                "rent_yield": None,
-                "tax_information": tax_information,
-                "mls_type": mls_type,
-                "mls_number": mls_number,
-                "days_on_compass": days_on_compass,
-                "last_updated": last_updated,
-                "favorite": 0
-            }
-            listings.append(listing)
-            
-    return listings
+    """Parse HTML email content (UTF-8 bytes or str) to extract real estate listings.
 
-def parse_individual_format(soup):
-    """Parse emails with individual listings format."""
-    listings = []
+    <tr> rows are handled as the parser completes them, and rows that have been
+    consumed are dropped from the tree, so the whole document is never held.
+    """
+    if not html_content or not html_content.strip():
+        return []
     
-    for row in soup.find_all("tr", class_="listingComponentV2"):
-        a_tag = row.find("a", href=True)
-        href = a_tag["href"] if a_tag else None
-        
-        # Extract base Compass URL without workspace parameters
-        if href and "compass.com/listing" in href:
-            # Extract just the base URL up to the listing ID
-            url_parts = href.split("?")[0]
-            href = url_parts
-        
-        price, beds, baths, sqft, full_address = None, None, None, None, None
-        city, state, zip_code = None, None, None
-        tax_information, mls_type, mls_number = None, None, None
-        days_on_compass, last_updated = None, None
+    collection_listings = []
+    individual_listings = []
+    # libxml2 decodes entities itself; _element_text() unescapes the short text
+    # slices again for the double-escaped entities some digests contain
+    if isinstance(html_content, str):
+        html_content = html_content.encode("utf-8")
+    source = io.BytesIO(html_content)
+    for _, row in etree.iterparse(source, tag="tr", html=True, encoding="utf-8"):
+        # A listing row followed by this row is a collection-format listing
+        prev = _previous_tr(row)
+        if _is_listing_row(prev):
+            listing = parse_collection_row(prev, row)
+            if listing:
+                collection_listings.append(listing)
+            prev.getparent().remove(prev)
         
-        price_tag = row.find("b")
-        if price_tag:
-            m = re.search(r"\$[\d,]+", price_tag.text)
-            if m:
-                price = int(m.group(0).replace("$", "").replace(",", ""))
-                
-        for span in row.find_all("span"):
-            text = span.get_text(strip=True)
-            # More specific matching for beds
-            if "BD" in text and not beds:
-                m = re.search(r"(\d+(?:\.\d+)?)\s*BD", text)
-                if m:
-                    beds = int(round(float(m.group(1))))
-            # More specific matching for baths
-            elif "BA" in text and not baths:
-                m = re.search(r"(\d+(?:\.\d+)?)\s*BA", text)
-                if m:
-                    baths = int(round(float(m.group(1))))
-            # More specific matching for sqft
-            elif "Sq.Ft." in text and not sqft:
-                m = re.search(r"([\d,]+)\s*Sq\.Ft\.", text)
-                if m:
-                    sqft = int(m.group(1).replace(",", ""))
-            
-            # Extract MLS number
-            elif "MLS#" in text and not mls_number:
-                m = re.search(r"MLS#\s*([A-Z0-9-]+)", text)
-                if m:
-                    mls_number = m.group(1).strip()
-            
-            # Extract MLS type
-            elif "MLS Type:" in text and not mls_type:
-                m = re.search(r"MLS Type:\s*([^,\n]+)", text)
-                if m:
-                    mls_type = m.group(1).strip()
-            
-            # Extract tax information
-            elif "Taxes:" in text and not tax_information:
-                m = re.search(r"Taxes:\s*([^,\n]+)", text)
-                if m:
-                    tax_information = m.group(1).strip()
-            
-            # Extract days on compass
-            elif "Days on Market:" in text and not days_on_compass:
-                m = re.search(r"Days on Market:\s*(\d+)", text)
-                if m:
-                    days_on_compass = int(m.group(1))
-            
-            # Extract last updated date
-            elif "Last Updated:" in text and not last_updated:
-                m = re.search(r"Last Updated:\s*([\d/]+)", text)
-                if m:
-                    last_updated = m.group(1)
-                    
-        for a in row.find_all("a"):
-            text = a.get_text(strip=True)
-            if "," in text and len(text) > 10:
-                full_address = text
-                street_address, city, state, zip_code = parse_address_components(full_address)
-                break
-                
-        if href and full_address:
-            listing = {
-                "address": street_address,
-                "url": href,
-                "price": price,
-                "beds": beds,
-                "baths": baths,
-                "sqft": sqft,
-                "price_per_sqft": int(price / sqft) if price and sqft else None,
-                "city": city,
-                "state": state,
-                "zip": zip_code,
-                "estimated_rent": None,
-                "rent_yield": None,
-                "tax_information": tax_information,
-                "mls_type": mls_type,
-                "mls_number": mls_number,
-                "days_on_compass": days_on_compass,
-                "last_updated": last_updated,
-                "favorite": 0
-            }
-            listings.append(listing)
-            
-    return listings
+        if _is_listing_row(row):
+            # Individual format is only a fallback, so stop once a collection listing is seen
+            if not collection_listings:
+                listing = parse_individual_row(row)
+                if listing:
+                    individual_listings.append(listing)
+        elif not _inside_listing(row):
+            row.clear()
+    
+    # Prefer the collection format; fall back to individual listings
+    return collection_listings or individual_listings
+
+def _is_listing_row(el):
+    """True if el is a <tr class="listingComponentV2">."""
+    return el is not None and "listingComponentV2" in (el.get("class") or "").split()
+
+def _previous_tr(el):
+    """Closest preceding sibling <tr> of el, or None."""
+    prev = el.getprevious()
+    while prev is not None and prev.tag != "tr":
+        prev = prev.getprevious()
+    return prev
+
+def _inside_listing(el):
+    """True if el is nested in a listing row or in the row that follows one."""
+    for ancestor in el.iterancestors("tr"):
+        if _is_listing_row(ancestor) or _is_listing_row(_previous_tr(ancestor)):
+            return True
+    return False
+
+def _element_text(el, separator=""):
+    """Stripped, non-empty text fragments under el joined by separator."""
+    return separator.join(t for t in (html.unescape(s).strip() for s in el.itertext()) if t)
+
+def _scan_listing_fields(text, field_re, fields):
+    """Fill the still-empty entries of `fields` from a single pass over `text`."""
+    first_matches = {}
+    for m in field_re.finditer(text):
+        first_matches.setdefault(m.lastgroup, m)
+    for name, m in first_matches.items():
+        if not fields[name]:
+            fields[name] = _FIELD_CONVERTERS[name](m.group(name))
+
+@dataclass(slots=True)
+class Listing:
+    """A listing parsed from a Compass email; converted to a dict for insert_listings()."""
+    address: str
+    url: str
+    price: Optional[int] = None
+    beds: Optional[int] = None
+    baths: Optional[int] = None
+    sqft: Optional[int] = None
+    price_per_sqft: Optional[int] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    zip: Optional[str] = None
+    estimated_rent: Optional[float] = None
+    rent_yield: Optional[float] = None
+    tax_information: Optional[str] = None
+    mls_type: Optional[str] = None
+    mls_number: Optional[str] = None
+    days_on_compass: Optional[int] = None
+    last_updated: Optional[str] = None
+    favorite: int = 0
+    from_collection: bool = False
+    label: Optional[str] = None
+
+def _build_listing(street_address, href, city, state, zip_code, fields, from_collection):
+    """Assemble a Listing from the parsed address and scanned fields."""
+    price = fields["price"]
+    sqft = fields["sqft"]
+    return Listing(
+        address=street_address,
+        url=href,
+        price=price,
+        beds=fields["beds"],
+        baths=fields["baths"],
+        sqft=sqft,
+        price_per_sqft=int(price / sqft) if price and sqft else None,
+        city=city,
+        state=state,
+        zip=zip_code,
+        tax_information=fields["tax_information"],
+        mls_type=fields["mls_type"],
+        mls_number=fields["mls_number"],
+        days_on_compass=fields["days_on_compass"],
+        last_updated=fields["last_updated"],
+        from_collection=from_collection
+    )
+
+def _listing_href(row):
+    """First link in a listing row, trimmed to the base Compass listing URL."""
+    a_tag = row.find(".//a[@href]")
+    href = a_tag.get("href") if a_tag is not None else None
+    
+    # Extract base Compass URL without workspace parameters
+    if href and "compass.com/listing" in href:
+        # Extract just the base URL up to the listing ID
+        href = href.partition("?")[0]
+    return href
+
+def parse_collection_row(row, next_tr):
+    """Parse one listing from a collection email (multiple properties).
+
+    The listing row holds the link; the row after it holds the details.
+    """
+    href = _listing_href(row)
+    full_address = None
+    city, state, zip_code = None, None, None
+    fields = dict.fromkeys(_LISTING_FIELDS)
+    
+    for div in next_tr.iter("div"):
+        a = div.find(".//a")
+        a_text = _element_text(a) if a is not None else ""
+        if "," in a_text:
+            full_address = a_text
+            street_address, city, state, zip_code = parse_address_components(full_address)
+            break
+    
+    # Scan only the outermost divs of the row: a nested div's text is already
+    # part of its parent's, so the row's text is extracted once instead of
+    # once per nesting level.
+    depth = sum(1 for _ in next_tr.iterancestors("div"))
+    for div in next_tr.xpath(".//div[count(ancestor::div) = $depth]", depth=depth):
+        _scan_listing_fields(_element_text(div, " "), _COLLECTION_FIELD_RE, fields)
+        # Filled fields are never overwritten, so the remaining divs can't change anything
+        if all(fields.values()):
+            break
+    
+    if href and full_address:
+        return _build_listing(street_address, href, city, state, zip_code, fields, True)
+    return None
+
+def parse_individual_row(row):
+    """Parse one listing from an individual listing email."""
+    href = _listing_href(row)
+    full_address = None
+    city, state, zip_code = None, None, None
+    fields = dict.fromkeys(_LISTING_FIELDS)
+    
+    price_tag = row.find(".//b")
+    if price_tag is not None:
+        m = _PRICE_RE.search("".join(price_tag.itertext()))
+        if m:
+            fields["price"] = _FIELD_CONVERTERS["price"](m.group(0))
+    
+    for span in row.iter("span"):
+        _scan_listing_fields(_element_text(span), _SPAN_FIELD_RE, fields)
+        if all(fields[name] for name in _SPAN_FIELDS):
+            break
+    
+    for a in row.iter("a"):
+        text = _element_text(a)
+        if "," in text and len(text) > 10:
+            full_address = text
+            street_address, city, state, zip_code = parse_address_components(full_address)
+            break
+    
+    if href and full_address:
+        return _build_listing(street_address, href, city, state, zip_code, fields, False)
+    return None
+
+def _read_json(path):
+    """Load a JSON file, using orjson when it is installed."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _write_json(path, obj):
+    """Write obj to a JSON file, using orjson when it is installed."""
+    data = orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+def load_cached_listings(message_id):
+    """Return the cached parsed listings for a message, or None on a miss."""
+    try:
+        cached = _read_json(PARSED_CACHE_DIR / f"{message_id}.json")
+        if cached.get("version") != PARSED_CACHE_VERSION:
+            return None
+        return [Listing(**listing) for listing in cached["listings"]]
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+def save_cached_listings(message_id, listings):
+    """Cache the parsed listings for a message."""
+    try:
+        PARSED_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path = PARSED_CACHE_DIR / f"{message_id}.json"
+        tmp_path = cache_path.with_suffix(f".{threading.get_ident()}.tmp")
+        _write_json(tmp_path, {"version": PARSED_CACHE_VERSION, "listings": [asdict(listing) for listing in listings]})
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        _locked_print(f"⚠️ Could not cache listings for message {message_id}: {e}")
+
+def _email_from_message(message_id, msg):
+    """Build the email entry for a fetched Gmail message, or None without HTML."""
+    # Log message details for debugging
+    if 'payload' in msg and 'headers' in msg['payload']:
+        for header in msg['payload']['headers']:
+            if header['name'] in ['Subject', 'Date']:
+                log.debug("%s: %s", header['name'], header['value'])
+    
+    # Get HTML content from payload, preferring the shallowest text/html part
+    data, depth = find_html_body(msg.get('payload', {}))
+    if not data:
+        _locked_print(f"⚠️ No HTML content found in message {message_id}")
+        # Log message structure for debugging
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Message structure:\n%s", json.dumps(msg['payload'], indent=2))
+        return None
+    
+    # Keep the raw UTF-8 bytes; the parser reads them without a decode/encode round trip
+    html_content = base64.urlsafe_b64decode(data)
+    log.debug("✅ Found HTML content in %s", _HTML_PART_LOCATIONS[min(depth, 2)])
+    return {
+        'id': message_id,
+        'html_content': html_content
+    }
+
+def stream_emails_with_label(service, label_id, max_results=10):
+    """Yield emails with a specific label as each Gmail batch request completes.
 
-def fetch_emails_with_label(service, label_id, max_results=10):
-    """Fetch emails with a specific label."""
+    Emails are yielded in the label's list order. Messages whose listings are
+    already cached are not fetched again; their entries carry 'listings'
+    instead of 'html_content'.
+    """
     try:
-        print(f"🔍 Searching for emails with label ID: {label_id}")
+        _locked_print(f"🔍 Searching for emails with label ID: {label_id}")
         
         # Ensure label ID has Label_ prefix
         if not label_id.startswith('Label_'):
             label_id = f'Label_{label_id}'
-            print(f"ℹ️ Added Label_ prefix to label ID: {label_id}")
+            _locked_print(f"ℹ️ Added Label_ prefix to label ID: {label_id}")
         
         # Get list of email IDs with this label
         results = service.users().messages().list(
@@ -314,106 +466,103 @@ def fetch_emails_with_label(service, label_id, max_results=10):
         
         messages = results.get('messages', [])
         if not messages:
-            print("⚠️ No messages found with this label")
-            return []
+            _locked_print("⚠️ No messages found with this label")
+            return
         
-        print(f"✅ Found {len(messages)} messages")
+        _locked_print(f"✅ Found {len(messages)} messages")
         
-        # Fetch each email's content
-        emails = []
-        for message in messages:
-            print(f"📧 Fetching message {message['id']}")
-            msg = service.users().messages().get(
-                userId='me',
-                id=message['id'],
-                format='full'
-            ).execute()
-            
-            # Print message details for debugging
-            if 'payload' in msg and 'headers' in msg['payload']:
-                for header in msg['payload']['headers']:
-                    if header['name'] in ['Subject', 'Date']:
-                        print(f"{header['name']}: {header['value']}")
-            
-            # Get HTML content from payload
-            html_content = None
-            
-            # First try to get HTML content directly from payload
-            if 'payload' in msg and msg['payload'].get('mimeType') == 'text/html':
-                data = msg['payload'].get('body', {}).get('data')
-                if data:
-                    html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-                    print("✅ Found HTML content in main payload")
-            
-            # If not found, look in parts
-            if not html_content and 'payload' in msg and 'parts' in msg['payload']:
-                for part in msg['payload']['parts']:
-                    if part['mimeType'] == 'text/html':
-                        data = part.get('body', {}).get('data')
-                        if data:
-                            html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-                            print("✅ Found HTML content in message parts")
-                            break
-            
-            # If still not found, look in nested parts
-            if not html_content and 'payload' in msg and 'parts' in msg['payload']:
-                for part in msg['payload']['parts']:
-                    if 'parts' in part:
-                        for subpart in part['parts']:
-                            if subpart['mimeType'] == 'text/html':
-                                data = subpart.get('body', {}).get('data')
-                                if data:
-                                    html_content = base64.urlsafe_b64decode(data).decode('utf-8')
-                                    print("✅ Found HTML content in nested parts")
-                                    break
-            
-            if html_content:
-                print("✅ Successfully extracted HTML content")
-                emails.append({
-                    'id': message['id'],
-                    'html_content': html_content
-                })
+        # Fetch each uncached email's content, up to GMAIL_BATCH_SIZE messages per HTTP round-trip
+        cached_listings = {message['id']: load_cached_listings(message['id']) for message in messages}
+        to_fetch = [message for message in messages if cached_listings[message['id']] is None]
+        position = {message['id']: i for i, message in enumerate(messages)}
+        responses = {}
+        
+        def on_message(request_id, response, exception):
+            if exception is not None:
+                _locked_print(f"❌ Error fetching message {request_id}: {exception}")
             else:
-                print("⚠️ No HTML content found in message")
-                # Print message structure for debugging
-                print("Message structure:")
-                print(json.dumps(msg['payload'], indent=2))
+                responses[request_id] = response
         
-        print(f"✅ Successfully processed {len(emails)} emails")
-        return emails
+        email_count = 0
+        yielded = 0
+        batches = [to_fetch[start:start + GMAIL_BATCH_SIZE] for start in range(0, len(to_fetch), GMAIL_BATCH_SIZE)]
+        for batch_messages in batches + [[]]:
+            if batch_messages:
+                batch = service.new_batch_http_request(callback=on_message)
+                for message in batch_messages:
+                    log.debug("📧 Fetching message %s", message['id'])
+                    batch.add(service.users().messages().get(
+                        userId='me',
+                        id=message['id'],
+                        format='full',
+                        fields=GMAIL_MESSAGE_FIELDS
+                    ), request_id=message['id'])
+                batch.execute()
+                # Every message up to the last one in this batch is now available
+                ready = position[batch_messages[-1]['id']] + 1
+            else:
+                ready = len(messages)
+            
+            for message in messages[yielded:ready]:
+                listings = cached_listings[message['id']]
+                if listings is not None:
+                    log.debug("💾 Using cached listings for message %s", message['id'])
+                    email = {
+                        'id': message['id'],
+                        'listings': listings
+                    }
+                else:
+                    msg = responses.pop(message['id'], None)
+                    email = _email_from_message(message['id'], msg) if msg is not None else None
+                if email:
+                    email_count += 1
+                    yield email
+            yielded = ready
+        
+        _locked_print(f"✅ Successfully processed {email_count} emails")
     except Exception as e:
-        print(f"❌ Error fetching emails: {e}")
+        _locked_print(f"❌ Error fetching emails: {e}")
         import traceback
         traceback.print_exc()
-        return []
 
 def enrich_with_rent(listings, rent_data):
-    """Add estimated rent and yield data to listings."""
+    """Add estimated rent and yield data to listings.
+
+    rent_data maps 5-digit ZIP strings to monthly rent (see load_zori_data);
+    listing ZIPs are already strings, so they are looked up as-is.
+    """
+    missing_zips = set()
     for listing in listings:
-        zip_code = listing.get("zip")
-        if zip_code and str(zip_code) in rent_data:
-            rent = rent_data[str(zip_code)]
-            listing["estimated_rent"] = rent
-            if listing.get("price"):
-                listing["rent_yield"] = round(12 * rent / listing["price"], 4)
-        else:
-            if zip_code:
-                print(f"⚠️ No rent data available for ZIP: {zip_code}")
+        zip_code = listing.zip
+        if not zip_code:
+            continue
+        rent = rent_data.get(zip_code)
+        if rent is None:
+            missing_zips.add(zip_code)
+            continue
+        listing.estimated_rent = rent
+        price = listing.price
+        if price:
+            listing.rent_yield = round(12 * rent / price, 4)
+    
+    if missing_zips:
+        print(f"⚠️ No rent data available for {len(missing_zips)} ZIP(s): {', '.join(sorted(missing_zips))}")
 
 def print_listing_details(listing, label_name=None, changes=None):
-    """Print formatted details of a listing."""
+    """Print formatted details of a listing as a single block."""
+    lines = []
     if label_name:
-        print(f"🏷️ Label: {label_name}")
-    print("🏡 Address:", listing.get("address", "N/A"))
+        lines.append(f"🏷️ Label: {label_name}")
+    lines.append(f"🏡 Address: {listing.address}")
     
     # Print price with change indicator if it changed
-    price = listing.get("price")
+    price = listing.price
     if changes and "price" in changes:
         old_price = changes["price"][0]
         new_price = changes["price"][1]
-        print(f"💲 Price: ${old_price:,} → ${new_price:,} (Changed)")
+        lines.append(f"💲 Price: ${old_price:,} → ${new_price:,} (Changed)")
     else:
-        print("💲 Price:", f"${price:,}" if price else "N/A")
+        lines.append(f"💲 Price: {f'${price:,}' if price else 'N/A'}")
     
     # Print other fields with change indicators
     for field, display in [
@@ -423,22 +572,22 @@ def print_listing_details(listing, label_name=None, changes=None):
         ("mls_type", "🏷️ MLS Type"),
         ("tax_information", "💵 Tax Info")
     ]:
-        value = listing.get(field)
+        value = getattr(listing, field)
         if changes and field in changes:
             old_val = changes[field][0]
             new_val = changes[field][1]
-            print(f"{display}: {old_val} → {new_val} (Changed)")
+            lines.append(f"{display}: {old_val} → {new_val} (Changed)")
         else:
-            print(f"{display}:", value if value else "N/A")
+            lines.append(f"{display}: {value if value else 'N/A'}")
     
-    print("🏙 City/State/Zip:", 
-          f"{listing.get('city', 'N/A')}, {listing.get('state', 'N/A')} {listing.get('zip', 'N/A')}")
-    print("💰 Est. Rent:", 
-          f"${listing.get('estimated_rent'):,}/mo" if listing.get("estimated_rent") else "N/A")
-    print("📊 Rent Yield:", 
-          f"{listing.get('rent_yield')*100:.2f}%" if listing.get("rent_yield") else "N/A")
-    print("🔗 URL:", listing.get("url", "N/A"))
-    print("-" * 60)
+    estimated_rent = listing.estimated_rent
+    rent_yield = listing.rent_yield
+    lines.append(f"🏙 City/State/Zip: {listing.city}, {listing.state} {listing.zip}")
+    lines.append(f"💰 Est. Rent: {f'${estimated_rent:,}/mo' if estimated_rent else 'N/A'}")
+    lines.append(f"📊 Rent Yield: {f'{rent_yield*100:.2f}%' if rent_yield else 'N/A'}")
+    lines.append(f"🔗 URL: {listing.url}")
+    lines.append("-" * 60)
+    print("\n".join(lines))
 
 def load_label_config(config_file):
     """Load label configuration from JSON file."""
@@ -448,8 +597,7 @@ def load_label_config(config_file):
             config_path = ROOT / config_path
         
         print(f"📋 Loading label configuration from {config_path}...")
-        with open(config_path) as f:
-            config = json.load(f)
+        config = _read_json(config_path)
         
         if "property_listings" not in config:
             print("❌ Invalid configuration: missing 'property_listings' key")
@@ -471,25 +619,31 @@ def load_label_config(config_file):
         print(f"❌ Error loading configuration: {e}")
         return None
 
-def is_email_processed(email_id):
-    """Check if an email has already been processed."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM processed_emails WHERE message_id = ?", (email_id,))
-    result = cursor.fetchone() is not None
-    conn.close()
-    return result
-
-def mark_email_processed(email_id, label_id):
-    """Mark an email as processed."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO processed_emails (message_id, label_id, source)
-        VALUES (?, ?, 'gmail-multi-label')
-    """, (email_id, label_id))
-    conn.commit()
-    conn.close()
+def _get_db_connection():
+    """Return the shared database connection, opening it on first use."""
+    global _db_connection
+    with _db_lock:
+        if _db_connection is None:
+            _db_connection = sqlite3.connect(DB_PATH, check_same_thread=False)
+            _db_connection.executescript(DB_CONNECTION_PRAGMAS)
+        return _db_connection
+
+def load_processed_email_ids():
+    """Return the ids of all emails already recorded as processed."""
+    conn = _get_db_connection()
+    with _db_lock:
+        return {row[0] for row in conn.execute("SELECT message_id FROM processed_emails")}
+
+def mark_emails_processed(email_ids, label_id):
+    """Mark a label's emails as processed in a single transaction."""
+    if not email_ids:
+        return
+    conn = _get_db_connection()
+    with _db_lock, conn:
+        conn.executemany("""
+            INSERT OR IGNORE INTO processed_emails (message_id, label_id, source)
+            VALUES (?, ?, 'gmail-multi-label')
+        """, [(email_id, label_id) for email_id in email_ids])
 
 def get_project_root():
     env_root = os.environ.get("PROPERTY_PIPELINE_ROOT")
@@ -509,6 +663,122 @@ PROJECT_ROOT = get_project_root()
 DEFAULT_CREDENTIALS = str(PROJECT_ROOT / "config" / "credentials.json")
 DEFAULT_TOKEN = str(PROJECT_ROOT / "config" / "token.pickle")
 
+def _thread_gmail_service(args):
+    """Return this thread's Gmail service, authenticating on first use.
+
+    The httplib2 transport under googleapiclient is not thread-safe, so
+    services are never shared between worker threads.
+    """
+    service = getattr(_thread_state, "service", None)
+    if service is None:
+        # authenticate_gmail() prints its progress itself; holding the print lock
+        # keeps those lines together and workers from writing the token at once
+        with _print_lock:
+            service = authenticate_gmail(args.credentials, args.token)
+        _thread_state.service = service
+    return service
+
+def _process_label(label_name, label_id, args, processed_ids):
+    """Fetch and parse all new emails for one label; returns (label_name, listings).
+
+    processed_ids is the shared set of already-processed email ids; emails this
+    label processes are added to it and recorded in the database at the end.
+    """
+    # Every listing from this label shares one label string
+    label_name = sys.intern(label_name)
+    _locked_print(f"\n📩 Processing label: {label_name} (ID: {label_id})...")
+    
+    service = _thread_gmail_service(args)
+    if not service:
+        return label_name, []
+    
+    # Fetch emails for this label on a producer thread, so the next Gmail batch
+    # downloads while this thread parses the emails already received
+    email_queue = queue.Queue(maxsize=GMAIL_BATCH_SIZE)
+    # Set when the consumer below stops, so the producer never blocks forever
+    # on a full queue nobody is reading
+    consumer_stopped = threading.Event()
+    
+    def put_email(item):
+        """Queue an item for the consumer; False once the consumer has stopped."""
+        while not consumer_stopped.is_set():
+            try:
+                email_queue.put(item, timeout=PRODUCER_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce_emails():
+        try:
+            for email in stream_emails_with_label(service, label_id, args.max_emails):
+                if not put_email(email):
+                    return
+        finally:
+            put_email(None)
+    
+    producer = threading.Thread(target=produce_emails, daemon=True)
+    producer.start()
+    
+    # Process each email
+    label_listings = []
+    newly_processed = []
+    email_count = 0
+    try:
+        for email in iter(email_queue.get, None):
+            email_count += 1
+            email_id = email['id']
+            
+            # Skip if already processed (unless force flag is set)
+            # Claim the email so another label worker holding it skips it too
+            with _processed_lock:
+                already_processed = not args.force and email_id in processed_ids
+                if not already_processed and not args.dry_run:
+                    processed_ids.add(email_id)
+            if already_processed:
+                log.debug("ℹ️ Skipping already processed email: %s", email_id)
+                continue
+            
+            log.debug("📝 Processing email %s...", email_id)
+            
+            # Parse listings from HTML, unless they came from the cache
+            email_listings = email.get('listings')
+            if email_listings is None:
+                email_listings = parse_html_email(email['html_content'])
+                save_cached_listings(email_id, email_listings)
+            if not email_listings:
+                _locked_print(f"⚠️ No listings found in email {email_id}")
+                # Not marked as processed, so release the claim
+                with _processed_lock:
+                    processed_ids.discard(email_id)
+                continue
+            
+            log.debug("✅ Found %d listings in email %s", len(email_listings), email_id)
+            
+            # Add label information to each listing
+            for listing in email_listings:
+                listing.label = label_name
+            
+            label_listings.extend(email_listings)
+            
+            # Mark email as processed (unless dry run)
+            if not args.dry_run:
+                newly_processed.append(email_id)
+    finally:
+        consumer_stopped.set()
+        producer.join()
+    
+    mark_emails_processed(newly_processed, label_id)
+    if not email_count:
+        _locked_print(f"⚠️ No emails found for label: {label_name}")
+        return label_name, []
+    
+    if label_listings:
+        _locked_print(f"✅ Fetched {len(label_listings)} new emails")
+    else:
+        _locked_print(f"⚠️ No listings found in any emails for label: {label_name}")
+    return label_name, label_listings
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(description="Parse Gmail emails for property listings")
@@ -518,8 +788,13 @@ def main():
     parser.add_argument("--credentials", default=DEFAULT_CREDENTIALS, help="Path to credentials.json file")
     parser.add_argument("--token", default=DEFAULT_TOKEN, help="Path to token.pickle file")
     parser.add_argument("--force", action="store_true", help="Force reprocessing of all emails")
+    parser.add_argument("--verbose", action="store_true", help="Print details for every parsed listing and per-message progress")
     args = parser.parse_args()
     
+    # Only this script's logger goes to DEBUG, not the Google client libraries
+    logging.basicConfig(format="%(message)s")
+    log.setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    
     # Load label configuration
     label_config = load_label_config(args.config)
     if not label_config:
@@ -532,63 +807,36 @@ def main():
     if not rent_data:
         return
     
-    # Authenticate with Gmail
-    service = authenticate_gmail(args.credentials, args.token)
-    if not service:
+    # Authenticate with Gmail once up front so an expired token is refreshed
+    # and saved before the worker threads load it
+    if not authenticate_gmail(args.credentials, args.token):
         return
     
-    # Process each enabled label
+    load_address_cache()
+    
+    # Look up already-processed emails once instead of querying per email
+    processed_ids = set() if args.force else load_processed_email_ids()
+    
+    # Process enabled labels concurrently; each worker thread gets its own Gmail service
     total_listings = []
     listings_per_label = {}
+    results = {}
     
-    for label_name, label_id in label_config.items():
-        print(f"\n📩 Processing label: {label_name} (ID: {label_id})...")
-        
-        # Fetch emails for this label
-        emails = fetch_emails_with_label(service, label_id, args.max_emails)
-        if not emails:
-            print(f"⚠️ No emails found for label: {label_name}")
-            continue
-        
-        # Process each email
-        label_listings = []
-        for email in emails:
-            email_id = email['id']
-            
-            # Skip if already processed (unless force flag is set)
-            if not args.force and is_email_processed(email_id):
-                print(f"ℹ️ Skipping already processed email: {email_id}")
-                continue
-            
-            print(f"\n📝 Processing email {email_id}...")
-            
-            # Parse listings from HTML
-            email_listings = parse_html_email(email['html_content'])
-            if not email_listings:
-                print("⚠️ No listings found in email")
-                continue
-            
-            print(f"✅ Found {len(email_listings)} listings in email")
-            
-            # Add label information to each listing
-            for listing in email_listings:
-                listing["label"] = label_name
-            
-            label_listings.extend(email_listings)
-            
-            # Mark email as processed (unless dry run)
-            if not args.dry_run:
-                mark_email_processed(email_id, label_id)
-        
-        if label_listings:
-            total_listings.extend(label_listings)
-            listings_per_label[label_name] = len(label_listings)
-            print(f"✅ Fetched {len(label_listings)} new emails")
-        else:
-            print(f"⚠️ No listings found in any emails for label: {label_name}")
-        # Add the label to the dictionary even if no listings were found, with a count of 0 if it's not already there
-        if label_name not in listings_per_label:
-            listings_per_label[label_name] = 0
+    with ThreadPoolExecutor(max_workers=min(MAX_LABEL_WORKERS, len(label_config))) as executor:
+        futures = [
+            executor.submit(_process_label, label_name, label_id, args, processed_ids)
+            for label_name, label_id in label_config.items()
+        ]
+        for future in as_completed(futures):
+            label_name, label_listings = future.result()
+            results[label_name] = label_listings
+    
+    save_address_cache()
+    
+    for label_name in label_config:
+        label_listings = results.get(label_name, [])
+        total_listings.extend(label_listings)
+        listings_per_label[label_name] = len(label_listings)
     
     if not total_listings:
         print("\n⚠️ No listings found in any emails")
@@ -597,10 +845,15 @@ def main():
     # Enrich listings with rent data
     enrich_with_rent(total_listings, rent_data)
     
+    if args.verbose:
+        for listing in total_listings:
+            print_listing_details(listing, listing.label)
+    
     # Insert listings into database (unless dry run)
     if not args.dry_run:
         print("\n🧾 Processing {} listings...".format(len(total_listings)))
-        insert_listings(total_listings)
+        # insert_listings() consumes one listing at a time, so convert lazily
+        insert_listings(asdict(listing) for listing in total_listings)
     
     # Print summary
     print("\n📝 Summary:")
@@ -3,7 +3,9 @@ import sys
 import os
 import glob
 import html
-from bs4 import BeautifulSoup
+import json
+import hashlib
+from lxml import html as lxml_html
 import quopri
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -12,6 +14,54 @@ sys.path.insert(0, ROOT)
 from lib.zori_utils import load_zori_data
 from lib.db_utils import insert_listings  
 
+# Parsed listings per EML file, reused while the file's mtime and size are
+# unchanged. Bump EML_CACHE_VERSION whenever parse_eml_file's output changes.
+EML_CACHE_DIR = os.path.join(ROOT, ".cache", "eml")
+EML_CACHE_VERSION = 2
+
+_PRICE_RE = re.compile(r"\$[\d,]+")
+
+_FIELD_PATTERNS = (
+    r"(?P<price>\$\d[\d,]*)",
+    r"(?P<beds>\d+(?:\.\d+)?)\s*BD",
+    r"(?P<baths>\d+(?:\.\d+)?)\s*BA",
+    r"(?P<sqft>\d[\d,]*)\s*Sq\.Ft\.",
+)
+# Price, beds, baths and sqft of a collection listing in one scan of each div.
+# The lookahead lets matches overlap, so every field still finds its leftmost
+# occurrence (e.g. "$1,200 Sq.Ft." yields both a price and a sqft).
+_DETAILS_RE = re.compile("(?=" + "|".join(_FIELD_PATTERNS) + ")")
+# Individual emails take the price from the <b> tag, not from the spans
+_SPAN_FIELD_RE = re.compile("(?=" + "|".join(_FIELD_PATTERNS[1:]) + ")")
+_FIELD_CONVERTERS = {
+    "price": lambda v: int(v.replace("$", "").replace(",", "")),
+    "beds": float,
+    "baths": float,
+    "sqft": lambda v: int(v.replace(",", "")),
+}
+
+def _scan_listing_fields(text, field_re, fields):
+    """Fill the still-empty entries of `fields` from a single pass over `text`."""
+    first_matches = {}
+    for m in field_re.finditer(text):
+        first_matches.setdefault(m.lastgroup, m)
+    for name, m in first_matches.items():
+        if not fields[name]:
+            fields[name] = _FIELD_CONVERTERS[name](m.group(name))
+
+def _is_listing_row(el):
+    """True if el is a <tr class="listingComponentV2">."""
+    return "listingComponentV2" in (el.get("class") or "").split()
+
+def _element_text(el, separator=""):
+    """Stripped, non-empty text fragments under el joined by separator."""
+    return separator.join(t for t in (s.strip() for s in el.itertext()) if t)
+
+def _listing_href(row):
+    """Target of the first link in a listing row, or None."""
+    a_tag = row.find(".//a[@href]")
+    return a_tag.get("href") if a_tag is not None else None
+
 import usaddress
 
 def parse_address_components(full_address):
@@ -41,145 +91,183 @@ def clean_url(raw_url):
 
 def parse_eml_file(filepath):
     """Parse an EML file to extract real estate listings."""
-    with open(filepath, "r", encoding="utf-8") as f:
-        raw_data = f.read()
+    # Decode quoted-printable straight from the file's bytes rather than
+    # decoding the whole message to str first; newlines are normalized the
+    # way text mode did
+    with open(filepath, "rb") as f:
+        raw_data = f.read().replace(b"\r\n", b"\n").replace(b"\r", b"\n")
 
     html_content = quopri.decodestring(raw_data).decode("utf-8", errors="ignore")
-    soup = BeautifulSoup(html.unescape(html_content), "html.parser")
-    listings = []
+    # The rows are walked with lxml's ElementTree API directly; bs4's tree
+    # wrapper cost more than the parse itself on these rigid tables.
+    # The unescape pass stays: some digests double-escape their entities.
+    parser = lxml_html.HTMLParser(encoding="utf-8")
+    tree = lxml_html.document_fromstring(html.unescape(html_content).encode("utf-8"), parser=parser)
+    # One pass over the listing rows. Each row is tried as a collection listing
+    # (details in the following <tr>) and, until a collection listing turns
+    # up, as an individual listing; individual results are only used when the
+    # email has no collection listings at all.
+    collection_listings = []
+    individual_listings = []
+    for row in tree.iter("tr"):
+        if not _is_listing_row(row):
+            continue
+        listing = parse_collection_row(row)
+        if listing:
+            collection_listings.append(listing)
+        elif not collection_listings:
+            listing = parse_individual_row(row)
+            if listing:
+                individual_listings.append(listing)
 
-    # --- Collection Email Parsing ---
-    for row in soup.find_all("tr", class_="listingComponentV2"):
-        a_tag = row.find("a", href=True)
-        href = a_tag["href"] if a_tag else None
+    return collection_listings or individual_listings
 
-        next_tr = row.find_next_sibling("tr")
-        if not next_tr:
-            continue
+def parse_collection_row(row):
+    """Parse one listing from a collection email; the next <tr> holds the details."""
+    href = _listing_href(row)
+
+    next_tr = next(row.itersiblings("tr"), None)
+    if next_tr is None:
+        return None
+
+    full_address = None
+    city, state, zip_code = None, None, None
+    fields = dict.fromkeys(_FIELD_CONVERTERS)
+
+    for div in next_tr.iter("div"):
+        text = _element_text(div, " ")
+
+        if not full_address:
+            a = div.find(".//a")
+            a_text = _element_text(a) if a is not None else ""
+            if "," in a_text:
+                full_address = a_text
+                # Use the parse_address_components function to split address correctly
+                street_address, city, state, zip_code = parse_address_components(full_address)
 
-        full_address, price, beds, baths, sqft = None, None, None, None, None
-        city, state, zip_code = None, None, None
-
-        for div in next_tr.find_all("div"):
-            text = div.get_text(" ", strip=True)
-
-            if not full_address:
-                a = div.find("a")
-                if a and "," in a.get_text(strip=True):
-                    full_address = a.get_text(strip=True)
-                    # Use the parse_address_components function to split address correctly
-                    street_address, city, state, zip_code = parse_address_components(full_address)
-
-            if "$" in text and not price:
-                m = re.search(r"\$[\d,]+", text)
-                if m:
-                    price = int(m.group(0).replace("$", "").replace(",", ""))
-
-            if "BD" in text and not beds:
-                m = re.search(r"(\d+(\.\d+)?)", text)
-                if m:
-                    beds = float(m.group(1))
-            if "BA" in text and not baths:
-                m = re.search(r"(\d+(\.\d+)?)", text)
-                if m:
-                    baths = float(m.group(1))
-            if "Sq.Ft." in text and not sqft:
-                m = re.search(r"([\d,]+)", text)
-                if m:
-                    sqft = int(m.group(1).replace(",", ""))
-
-        if href and full_address:
-            listing = {
-                "address": street_address,  # Now just the street part
-                "url": href,
-                "from_collection": True,
-                "price": price,
-                "beds": beds,
-                "baths": baths,
-                "sqft": sqft,
-                "city": city,
-                "state": state,
-                "zip": zip_code,
-                "estimated_rent": None,
-                "rent_yield": None
-            }
-            listings.append(listing)
-
-    # --- Individual Email Fallback ---
-    if not listings:
-        for row in soup.find_all("tr", class_="listingComponentV2"):
-            a_tag = row.find("a", href=True)
-            href = a_tag["href"] if a_tag else None
-
-            price, beds, baths, sqft, full_address = None, None, None, None, None
-            city, state, zip_code = None, None, None
-
-            price_tag = row.find("b")
-            if price_tag:
-                m = re.search(r"\$[\d,]+", price_tag.text)
-                if m:
-                    price = int(m.group(0).replace("$", "").replace(",", ""))
-
-            for span in row.find_all("span"):
-                text = span.get_text(strip=True)
-                if "BD" in text and not beds:
-                    m = re.search(r"(\d+(\.\d+)?)", text)
-                    if m:
-                        beds = float(m.group(1))
-                elif "BA" in text and not baths:
-                    m = re.search(r"(\d+(\.\d+)?)", text)
-                    if m:
-                        baths = float(m.group(1))
-                elif "Sq.Ft." in text and not sqft:
-                    m = re.search(r"([\d,]+)", text)
-                    if m:
-                        sqft = int(m.group(1).replace(",", ""))
-
-            for a in row.find_all("a"):
-                text = a.get_text(strip=True)
-                if "," in text and len(text) > 10:
-                    full_address = text
-                    # Use the parse_address_components function to split address correctly
-                    street_address, city, state, zip_code = parse_address_components(full_address)
-                    break
-
-            if href and full_address:
-                listing = {
-                    "address": street_address,  # Now just the street part
-                    "url": href,
-                    "from_collection": False,
-                    "price": price,
-                    "beds": beds,
-                    "baths": baths,
-                    "sqft": sqft,
-                    "city": city,
-                    "state": state,
-                    "zip": zip_code,
-                    "estimated_rent": None,
-                    "rent_yield": None
-                }
-                listings.append(listing)
+        _scan_listing_fields(text, _DETAILS_RE, fields)
+        # Filled fields are never overwritten, so the remaining divs can't change anything
+        if full_address and all(fields.values()):
+            break
 
+    if href and full_address:
+        return {
+            "address": street_address,  # Now just the street part
+            "url": href,
+            "from_collection": True,
+            "price": fields["price"],
+            "beds": fields["beds"],
+            "baths": fields["baths"],
+            "sqft": fields["sqft"],
+            "city": city,
+            "state": state,
+            "zip": zip_code,
+            "estimated_rent": None,
+            "rent_yield": None
+        }
+    return None
+
+def parse_individual_row(row):
+    """Parse one listing from an individual listing email."""
+    href = _listing_href(row)
+
+    full_address = None
+    city, state, zip_code = None, None, None
+    fields = dict.fromkeys(_FIELD_CONVERTERS)
+
+    price_tag = row.find(".//b")
+    if price_tag is not None:
+        m = _PRICE_RE.search(price_tag.text_content())
+        if m:
+            fields["price"] = int(m.group(0).replace("$", "").replace(",", ""))
+
+    for span in row.iter("span"):
+        _scan_listing_fields(_element_text(span), _SPAN_FIELD_RE, fields)
+
+    for a in row.iter("a"):
+        text = _element_text(a)
+        if "," in text and len(text) > 10:
+            full_address = text
+            # Use the parse_address_components function to split address correctly
+            street_address, city, state, zip_code = parse_address_components(full_address)
+            break
+
+    if href and full_address:
+        return {
+            "address": street_address,  # Now just the street part
+            "url": href,
+            "from_collection": False,
+            "price": fields["price"],
+            "beds": fields["beds"],
+            "baths": fields["baths"],
+            "sqft": fields["sqft"],
+            "city": city,
+            "state": state,
+            "zip": zip_code,
+            "estimated_rent": None,
+            "rent_yield": None
+        }
+    return None
+
+def parse_eml_cached(filepath, use_cache=True):
+    """parse_eml_file() backed by an on-disk cache keyed by path, mtime and size."""
+    stat = os.stat(filepath)
+    stamp = [EML_CACHE_VERSION, stat.st_mtime_ns, stat.st_size]
+    key = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(EML_CACHE_DIR, f"{key}.json")
+
+    if use_cache:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("stamp") == stamp:
+                return cached["listings"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+
+    listings = parse_eml_file(filepath)
+    try:
+        os.makedirs(EML_CACHE_DIR, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"stamp": stamp, "listings": listings}, f)
+    except (OSError, TypeError) as e:
+        print(f"⚠️ Could not cache listings for {filepath}: {e}")
     return listings
 
 def enrich_with_rent(listings, rent_data):
     """Add estimated rent and yield data to listings."""
     for listing in listings:
         zip_code = listing.get("zip")
-        if zip_code and str(zip_code) in rent_data:
-            rent = rent_data[str(zip_code)]
-            listing["estimated_rent"] = rent
-            if listing.get("price"):
-                listing["rent_yield"] = round(12 * rent / listing["price"], 4)
+        rent = rent_data.get(str(zip_code)) if zip_code else None
+        if rent is None:
+            continue
+        listing["estimated_rent"] = rent
+        if listing.get("price"):
+            listing["rent_yield"] = round(12 * rent / listing["price"], 4)
+
+def format_listing(listing):
+    """Render a listing as the block of lines main() prints for it."""
+    price = f"${listing.get('price'):,}" if listing.get("price") else "N/A"
+    return (
+        f"🏡 Address: {listing.get('address', 'N/A')}\n"
+        f"💲 Price: {price}\n"
+        f"🛏 Beds: {listing.get('beds', 'N/A')}\n"
+        f"🛁 Baths: {listing.get('baths', 'N/A')}\n"
+        f"📐 Sqft: {listing.get('sqft', 'N/A')}\n"
+        f"🏙 City/State/Zip: {listing.get('city', 'N/A')}, {listing.get('state', 'N/A')} {listing.get('zip', 'N/A')}\n"
+        f"🔗 URL: {listing.get('url', 'N/A')}\n"
+        f"{'-' * 60}\n"
+    )
 
 def main():
     import sys
     dry_run = "--dry-run" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
     args = [a for a in sys.argv[1:] if not a.startswith("--")]
     file_listing_counts = {}  # Track per-file listing counts
     
     if not args:
-        print("Usage: python scripts/parse_eml_and_insert.py data/*.eml")
+        print("Usage: python scripts/parse_eml_and_insert.py [--dry-run] [--no-cache] data/*.eml")
         return
 
     rent_data = load_zori_data(os.path.join(ROOT, "data", "zori_latest.csv"))
@@ -195,20 +283,13 @@ def main():
                 
             processed_files.add(filepath)
             print(f"📥 Parsing {filepath}")
-            listings = parse_eml_file(filepath)
+            listings = parse_eml_cached(filepath, use_cache)
             enrich_with_rent(listings, rent_data)
             
             if listings:
                 print(f"✅ Found {len(listings)} listings in {os.path.basename(filepath)}")
-                for listing in listings:
-                    print("🏡 Address:", listing.get("address", "N/A"))
-                    print("💲 Price:", f"${listing.get('price'):,}" if listing.get("price") else "N/A")
-                    print("🛏 Beds:", listing.get("beds", "N/A"))
-                    print("🛁 Baths:", listing.get("baths", "N/A"))
-                    print("📐 Sqft:", listing.get("sqft", "N/A"))
-                    print("🏙 City/State/Zip:", f"{listing.get('city', 'N/A')}, {listing.get('state', 'N/A')} {listing.get('zip', 'N/A')}")
-                    print("🔗 URL:", listing.get("url", "N/A"))
-                    print("-" * 60)
+                # One write per file instead of eight print() calls per listing
+                sys.stdout.write("".join(format_listing(listing) for listing in listings))
                 
                 all_listings.extend(listings)
                 file_listing_counts[os.path.basename(filepath)] = len(listings)
@@ -2,13 +2,38 @@ import sqlite3
 import pandas as pd
 import logging
 import argparse
+import os
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lib.db_utils import ensure_indexes
+
 # --- Configuration ---
 DB_FILE = 'data/neighborhood_analysis.db'
 PROPERTY_TYPE_FOR_REPORT = 'Single Family Residential' # To find the relevant base data ID
 MIN_HOMES_SOLD_THRESHOLD_REPORT = 5 # Consistent with calculation script
 
+# Indexes behind the report queries. The first serves both the per-neighborhood
+# "latest period" lookup and the Top N ranking: equality on property_type, then
+# neighborhood_name and period_end newest-first, matching the
+# RANK() ... ORDER BY period_end DESC window so it needs no sort, with
+# homes_sold filtered from the index without touching the table rows. Only the
+# final ORDER BY on the metric value sorts, over the handful of ranked rows.
+# Earlier versions created idx_nd_prop_name_period with period_end ascending;
+# it is dropped because IF NOT EXISTS would otherwise keep it alongside.
+REPORT_INDEXES = (
+    "DROP INDEX IF EXISTS idx_nd_prop_name_period",
+    "CREATE INDEX IF NOT EXISTS idx_nd_prop_name_period_desc "
+    "ON neighborhood_data(property_type, neighborhood_name, period_end DESC, homes_sold)",
+    "CREATE INDEX IF NOT EXISTS idx_na_data_metric "
+    "ON neighborhood_appreciation(neighborhood_data_id, metric_type)",
+)
+
+# Latest data id per neighborhood, reused for repeated reports within a run.
+# Keyed on the database file's mtime so a rebuilt database is queried afresh.
+_latest_data_id_cache = {'db_mtime_ns': None, 'ids': {}}
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -18,14 +43,30 @@ def get_db_connection():
     try:
         conn = sqlite3.connect(DB_FILE, timeout=10)
         conn.row_factory = sqlite3.Row # Access columns by name
+        ensure_report_indexes(conn)
         return conn
     except sqlite3.Error as e:
         logging.error(f"Error connecting to database {DB_FILE}: {e}")
         raise
 
+def ensure_report_indexes(conn):
+    """Creates the indexes the report queries rely on, if they are missing."""
+    ensure_indexes(conn, REPORT_INDEXES, "report indexes")
+
 def get_latest_relevant_data_id(conn, neighborhood_name):
     """Finds the most recent neighborhood_data.id for a given neighborhood 
        that meets criteria (SFR, min homes sold)."""
+    try:
+        db_mtime_ns = os.stat(DB_FILE).st_mtime_ns
+    except OSError:
+        db_mtime_ns = None
+    if db_mtime_ns != _latest_data_id_cache['db_mtime_ns']:
+        _latest_data_id_cache['db_mtime_ns'] = db_mtime_ns
+        _latest_data_id_cache['ids'].clear()
+    cached_ids = _latest_data_id_cache['ids']
+    if db_mtime_ns is not None and neighborhood_name in cached_ids:
+        return cached_ids[neighborhood_name]
+
     query = f"""
     SELECT id
     FROM neighborhood_data
@@ -39,7 +80,10 @@ def get_latest_relevant_data_id(conn, neighborhood_name):
         cursor = conn.cursor()
         cursor.execute(query, (neighborhood_name, PROPERTY_TYPE_FOR_REPORT, MIN_HOMES_SOLD_THRESHOLD_REPORT))
         result = cursor.fetchone()
-        return result['id'] if result else None
+        latest_data_id = result['id'] if result else None
+        if db_mtime_ns is not None:
+            cached_ids[neighborhood_name] = latest_data_id
+        return latest_data_id
     except sqlite3.Error as e:
         logging.error(f"Error fetching latest data ID for {neighborhood_name}: {e}")
         return None
@@ -93,40 +137,31 @@ def get_neighborhood_appreciation_report(conn, neighborhood_name):
 def get_top_n_report(conn, top_n_count, metric_to_sort_by):
     logging.info(f"Generating Top {top_n_count} report based on '{metric_to_sort_by}'...")
 
-    # Step 1: Find the latest neighborhood_data.id for each neighborhood that meets base criteria
-    # This subquery ensures we are only looking at metrics from the latest valid period for each neighborhood.
-    # We also need to ensure that the specific metric_to_sort_by actually exists for that latest_data_id.
+    # Rank each neighborhood's qualifying rows by period_end in a single pass over
+    # neighborhood_data, then keep the latest period (rank 1; RANK keeps rows that
+    # tie on period_end). Only the specific metric_to_sort_by for that latest
+    # point is joined in, so neighborhoods without it drop out.
     query = f"""
-    WITH LatestRelevantData AS (
-        -- Select the latest period_end for each neighborhood meeting criteria
-        SELECT 
-            nd.neighborhood_name,
-            MAX(nd.period_end) AS max_period_end
-        FROM neighborhood_data nd
-        WHERE nd.property_type = ? 
-          AND nd.homes_sold >= ?
-        GROUP BY nd.neighborhood_name
-    ),
-    LatestDataWithMetric AS (
-        -- Join back to get the specific ID and check if the desired metric exists for this latest point
+    WITH RankedData AS (
         SELECT
             nd.id AS neighborhood_data_id,
             nd.neighborhood_name,
             nd.period_end,
-            na.value AS metric_value
+            RANK() OVER (PARTITION BY nd.neighborhood_name ORDER BY nd.period_end DESC) AS period_rank
         FROM neighborhood_data nd
-        JOIN LatestRelevantData lrd ON nd.neighborhood_name = lrd.neighborhood_name AND nd.period_end = lrd.max_period_end
-        JOIN neighborhood_appreciation na ON nd.id = na.neighborhood_data_id
         WHERE nd.property_type = ? 
           AND nd.homes_sold >= ?
-          AND na.metric_type = ? 
+          AND nd.period_end IS NOT NULL
     )
     SELECT 
-        ldm.neighborhood_name,
-        ldm.period_end,
-        ldm.metric_value
-    FROM LatestDataWithMetric ldm
-    ORDER BY ldm.metric_value DESC
+        rd.neighborhood_name,
+        rd.period_end,
+        na.value AS metric_value
+    FROM RankedData rd
+    JOIN neighborhood_appreciation na ON na.neighborhood_data_id = rd.neighborhood_data_id
+    WHERE rd.period_rank = 1
+      AND na.metric_type = ?
+    ORDER BY na.value DESC
     LIMIT ?;
     """
 
@@ -134,8 +169,6 @@ def get_top_n_report(conn, top_n_count, metric_to_sort_by):
         params = (
             PROPERTY_TYPE_FOR_REPORT, 
             MIN_HOMES_SOLD_THRESHOLD_REPORT,
-            PROPERTY_TYPE_FOR_REPORT, # For the join condition in LatestDataWithMetric
-            MIN_HOMES_SOLD_THRESHOLD_REPORT, # For the join condition in LatestDataWithMetric
             metric_to_sort_by,
             top_n_count
         )
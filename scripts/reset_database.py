@@ -6,12 +6,15 @@ This script will:
 2. Create a fresh database with the correct schema including tax_information and mls_type
 3. Migrate your existing data to the new schema
 
+If the existing database already has the current schema it is left alone; if
+it only lacks tax_information and/or mls_type, they are added in place with
+ALTER TABLE instead (after the backup).
+
 Run this from the project root directory.
 """
 
 import sqlite3
 import os
-import shutil
 from datetime import datetime
 from pathlib import Path
 
@@ -21,11 +24,57 @@ PROJECT_ROOT = SCRIPT_DIR.parent
 DATA_DIR = PROJECT_ROOT / "data"
 DB_PATH = DATA_DIR / "listings.db"
 BACKUP_PATH = DATA_DIR / f"listings_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+MIGRATE_BATCH_SIZE = 1000
+# The migration writes a throwaway .new file that only replaces the real
+# database once it succeeds, so it can skip fsyncs and keep its rollback
+# journal and temp data in memory
+MIGRATE_PRAGMAS = (
+    "PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF; "
+    "PRAGMA temp_store=MEMORY; PRAGMA cache_size=-65536;"
+)
+
+# Listings table with all columns
+LISTINGS_TABLE_SQL = '''
+CREATE TABLE listings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT,
+    city TEXT,
+    state TEXT,
+    zip TEXT,
+    price REAL,
+    beds REAL,
+    baths REAL,
+    sqft INTEGER,
+    estimated_rent REAL,
+    rent_yield REAL,
+    url TEXT UNIQUE,
+    source TEXT DEFAULT 'compass',
+    imported_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    from_collection BOOLEAN DEFAULT NULL,
+    tax_information TEXT,
+    mls_type TEXT
+)
+'''
+# url is UNIQUE, so SQLite already keeps an index on it. The old separate
+# idx_listings_url duplicated that one and only slowed down every insert.
+REDUNDANT_INDEX = "idx_listings_url"
+REDUNDANT_INDEX_SQL = f"DROP INDEX IF EXISTS {REDUNDANT_INDEX}"
+# Nullable columns added after the original schema; an older database that
+# only lacks these can gain them with ALTER TABLE instead of a full rebuild
+ADDABLE_COLUMNS = ("tax_information", "mls_type")
 
 def backup_database():
     """Create a backup of the current database."""
     if DB_PATH.exists():
-        shutil.copy2(DB_PATH, BACKUP_PATH)
+        # SQLite's online backup copies pages in C and gets a consistent
+        # snapshot even if another process is writing to the database
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(BACKUP_PATH)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
         print(f"✅ Created backup at {BACKUP_PATH}")
     else:
         print("ℹ️ No existing database found to backup")
@@ -36,23 +85,22 @@ def migrate_data(old_db_path, new_db_path):
         # Connect to both databases
         old_conn = sqlite3.connect(old_db_path)
         new_conn = sqlite3.connect(new_db_path)
+        new_conn.executescript(MIGRATE_PRAGMAS)
         
-        # Get the data from the old database
+        # Stream the data from the old database instead of loading it all at once
         cursor = old_conn.cursor()
         cursor.execute("SELECT * FROM listings")
-        rows = cursor.fetchall()
+        batch = cursor.fetchmany(MIGRATE_BATCH_SIZE)
         
         # Get column names from the old database
-        cursor.execute("PRAGMA table_info(listings)")
-        columns_info = cursor.fetchall()
-        column_names = [col[1] for col in columns_info]
+        column_names = [col[0] for col in cursor.description]
         
         # Check which columns exist in the old database
         has_tax_info = "tax_information" in column_names
         has_mls_type = "mls_type" in column_names
         
         # Insert data into the new database
-        if rows:
+        if batch:
             # Prepare the insert statement
             placeholders = ", ".join(["?"] * (len(column_names) + (0 if has_tax_info else 1) + (0 if has_mls_type else 1)))
             columns = ", ".join(column_names)
@@ -66,20 +114,21 @@ def migrate_data(old_db_path, new_db_path):
             # Create insert statement
             insert_sql = f"INSERT INTO listings ({columns}) VALUES ({placeholders})"
             
-            # Insert each row
+            # NULL values for the new columns the old rows don't have
+            padding = (None,) * ((0 if has_tax_info else 1) + (0 if has_mls_type else 1))
+            
+            # Insert the rows a batch at a time, all in one transaction
             new_cursor = new_conn.cursor()
-            for row in rows:
-                # Add NULL values for new columns if they don't exist
-                values = list(row)
-                if not has_tax_info:
-                    values.append(None)
-                if not has_mls_type:
-                    values.append(None)
-                
-                new_cursor.execute(insert_sql, values)
-                
+            migrated = 0
+            new_conn.execute("BEGIN")
+            while batch:
+                # Rows from an up-to-date schema need no padding and go in as fetched
+                new_cursor.executemany(insert_sql, [row + padding for row in batch] if padding else batch)
+                migrated += len(batch)
+                batch = cursor.fetchmany(MIGRATE_BATCH_SIZE)
             new_conn.commit()
-            print(f"✅ Migrated {len(rows)} records to the new database")
+                
+            print(f"✅ Migrated {migrated} records to the new database")
         else:
             print("ℹ️ No records found to migrate")
         
@@ -92,9 +141,79 @@ def migrate_data(old_db_path, new_db_path):
         print(f"❌ Error during migration: {e}")
         return False
 
+def listings_columns(conn):
+    """Column definitions of the listings table, as rows of PRAGMA table_info."""
+    return [tuple(col) for col in conn.execute("PRAGMA table_info(listings)")]
+
+def upgrade_in_place():
+    """Bring the existing database up to date without rebuilding it, if possible.
+
+    Nothing is changed when the listings table already matches the current
+    schema, apart from dropping REDUNDANT_INDEX if it is still there. When it
+    only lacks trailing ADDABLE_COLUMNS, they are added with ALTER TABLE after
+    a backup. Returns True if no rebuild is needed.
+    """
+    if not DB_PATH.exists():
+        return False
+
+    schema_conn = sqlite3.connect(":memory:")
+    schema_conn.execute(LISTINGS_TABLE_SQL)
+    expected = listings_columns(schema_conn)
+    schema_conn.close()
+
+    # Inspect the schema read-only; the database is only opened for writing
+    # once we know there is something to change
+    check_conn = sqlite3.connect(f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        current = listings_columns(check_conn)
+        has_redundant_index = check_conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (REDUNDANT_INDEX,)
+        ).fetchone() is not None
+    finally:
+        check_conn.close()
+
+    if current == expected:
+        if has_redundant_index:
+            # Dropping an index loses no data, so no backup is needed for this
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                conn.execute(REDUNDANT_INDEX_SQL)
+                conn.commit()
+            finally:
+                conn.close()
+            print(f"✅ Dropped redundant {REDUNDANT_INDEX} from {DB_PATH}; schema otherwise current")
+        else:
+            print(f"✅ Schema already current at {DB_PATH}, nothing to migrate")
+        return True
+
+    missing = expected[len(current):]
+    if not current or expected[:len(current)] != current:
+        return False
+    if any(col[1] not in ADDABLE_COLUMNS for col in missing):
+        return False
+
+    backup_database()
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute("BEGIN")
+        for col in missing:
+            conn.execute(f"ALTER TABLE listings ADD COLUMN {col[1]} {col[2]}")
+        conn.execute(REDUNDANT_INDEX_SQL)
+        conn.commit()
+        print(f"✅ Added {', '.join(col[1] for col in missing)} to {DB_PATH} without migrating data")
+        return True
+    finally:
+        conn.close()
+
 def recreate_database():
     """Create a fresh database with the correct schema."""
     try:
+        # Nothing to do for a current schema, and adding nullable columns is a
+        # metadata-only change; only rebuild and copy every row when the
+        # schema differs in some other way
+        if upgrade_in_place():
+            return
+
         # Back up the existing database
         backup_database()
         
@@ -106,32 +225,7 @@ def recreate_database():
         cursor = conn.cursor()
         
         # Create listings table with all columns
-        cursor.execute('''
-        CREATE TABLE listings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            address TEXT,
-            city TEXT,
-            state TEXT,
-            zip TEXT,
-            price REAL,
-            beds REAL,
-            baths REAL,
-            sqft INTEGER,
-            estimated_rent REAL,
-            rent_yield REAL,
-            url TEXT UNIQUE,
-            source TEXT DEFAULT 'compass',
-            imported_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            from_collection BOOLEAN DEFAULT NULL,
-            tax_information TEXT,
-            mls_type TEXT
-        )
-        ''')
-        
-        # Create indices
-        cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_listings_url ON listings(url);
-        ''')
+        cursor.execute(LISTINGS_TABLE_SQL)
         
         conn.commit()
         conn.close()
@@ -7,15 +7,24 @@ Usage: python scripts/show_listing_history.py <address>
 import sqlite3
 import sys
 from pathlib import Path
-from datetime import datetime
-import pytz
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 from itertools import groupby
 
 # Constants
 ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
 DB_PATH = ROOT / "data" / "listings.db"
-MTN_TZ = pytz.timezone('America/Denver')
-UTC_TZ = pytz.UTC
+
+from lib.db_utils import LISTING_CHANGES_INDEX_SQL, ensure_indexes, has_leading_index
+
+# Indexes behind the history lookups: the listing by address, then its changes.
+# The address index is only needed when no existing index leads with address
+# (init_db.py's UNIQUE constraint on address already provides one).
+ADDRESS_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_listings_address ON listings(address)"
+
+MTN_TZ = ZoneInfo('America/Denver')
+UTC_TZ = timezone.utc
 
 # Fields to exclude from output
 EXCLUDED_FIELDS = {'url', 'rent_yield'}
@@ -30,6 +39,32 @@ FIELD_NAMES = {
     "tax_information": "Tax Info"
 }
 
+# Emoji shown next to each field in the change list; others get FIELD_EMOJI_DEFAULT
+FIELD_EMOJIS = {
+    "price": "💰",
+    "beds": "🛏️",
+    "baths": "🚿",
+    "sqft": "📐",
+    "mls_type": "🏷️",
+    "tax_information": "💵",
+    "status": "📊",
+    "days_on_compass": "📅",
+    "last_updated": "🕒",
+    "mls_number": "🔢"
+}
+FIELD_EMOJI_DEFAULT = "📝"
+
+# Display names resolved so far, including the title-cased fallbacks
+_display_names = {}
+
+def display_name(field):
+    """Display name for a field, e.g. "days_on_compass" -> "Days On Compass"."""
+    name = _display_names.get(field)
+    if name is None:
+        name = FIELD_NAMES.get(field) or field.replace('_', ' ').title()
+        _display_names[field] = name
+    return name
+
 def format_value(field, value):
     """Format values for display based on field type"""
     if value == "None" or value is None:
@@ -43,31 +78,35 @@ def format_value(field, value):
         return f"${float(value):,.2f}/sqft"
     return value
 
+def format_timestamp(timestamp):
+    """Format a stored ISO timestamp in Mountain Time."""
+    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    return dt.astimezone(MTN_TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
+
 def show_listing_history(address):
     """Show the history of changes for a specific listing."""
     conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row  # Access columns by name
     c = conn.cursor()
     
-    # Get listing ID and first seen timestamp
+    # Databases created before the indexes existed get them on first use
+    history_indexes = [LISTING_CHANGES_INDEX_SQL]
+    if not has_leading_index(conn, "listings", "address"):
+        history_indexes.insert(0, ADDRESS_INDEX_SQL)
+    ensure_indexes(conn, history_indexes, "listing history indexes")
+    
+    # Get listing ID, first seen timestamp and current listing details
     c.execute("""
-        SELECT id, created_at 
+        SELECT id, created_at, price, beds, baths, sqft, mls_type, tax_information
         FROM listings 
         WHERE address = ?
     """, (address,))
-    result = c.fetchone()
-    if not result:
+    current = c.fetchone()
+    if not current:
         print(f"❌ No listing found with address: {address}")
         return
     
-    listing_id, first_seen = result
-    
-    # Get current listing details
-    c.execute("""
-        SELECT price, beds, baths, sqft, mls_type, tax_information
-        FROM listings WHERE id = ?
-    """, (listing_id,))
-    current = c.fetchone()
-    current_dict = dict(zip(["price", "beds", "baths", "sqft", "mls_type", "tax_information"], current))
+    listing_id, first_seen = current["id"], current["created_at"]
     
     # Get changes, excluding URL changes and deduplicating price changes within 5 minutes
     c.execute("""
@@ -90,19 +129,18 @@ def show_listing_history(address):
             FROM listing_changes
             WHERE listing_id = ?
             AND field_name NOT IN ('rent_yield', 'source_label', 'url')
+            AND changed_at IS NOT NULL
         )
         SELECT field_name, old_value, new_value, changed_at
         FROM RankedChanges
         WHERE rn = 1
-        ORDER BY changed_at DESC
+        ORDER BY changed_at DESC, field_name
     """, (listing_id,))
     
     changes = c.fetchall()
     
     # Convert first_seen to Mountain Time
-    first_seen_dt = datetime.fromisoformat(first_seen.replace('Z', '+00:00'))
-    first_seen_dt = first_seen_dt.astimezone(pytz.timezone("America/Denver"))
-    first_seen_formatted = first_seen_dt.strftime("%Y-%m-%d %H:%M:%S %Z")
+    first_seen_formatted = format_timestamp(first_seen)
     
     # Print header
     print(f"\n🏠 Property History: {address}")
@@ -114,25 +152,22 @@ def show_listing_history(address):
         print("\nNo changes recorded since first seen.")
     else:
         # Group changes by timestamp
-        for timestamp, group in groupby(changes, key=lambda x: x[3]):
+        for timestamp, group in groupby(changes, key=lambda x: x["changed_at"]):
             # Convert to Mountain Time
-            mt_timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            mt_timestamp = mt_timestamp.astimezone(pytz.timezone("America/Denver"))
-            formatted_time = mt_timestamp.strftime("%Y-%m-%d %H:%M:%S %Z")
+            formatted_time = format_timestamp(timestamp)
             
             print(f"\n📊 Changes on {formatted_time}")
             print("-" * 60)
             
-            # Sort changes to group related fields
-            sorted_changes = sorted(group, key=lambda x: x[0])
-            
-            for field, old_val, new_val, _ in sorted_changes:
-                emoji = get_field_emoji(field)
-                field_name = FIELD_NAMES.get(field, field.replace('_', ' ').title())
+            # The query already orders each timestamp's changes by field name
+            for change in group:
+                field = change["field_name"]
+                emoji = FIELD_EMOJIS.get(field, FIELD_EMOJI_DEFAULT)
+                field_name = display_name(field)
                 
                 # Format the values
-                old_val = format_value(field, old_val)
-                new_val = format_value(field, new_val)
+                old_val = format_value(field, change["old_value"])
+                new_val = format_value(field, change["new_value"])
                 
                 # Print with better alignment
                 print(f"{emoji} {field_name:<20} {old_val:>15}  →  {new_val:<15}")
@@ -149,27 +184,11 @@ def show_listing_history(address):
     
     for section, fields in property_details.items():
         print(f"\n{section}:")
+        # Every field listed here is selected by the current-details query
         for field in fields:
-            if field in current_dict:
-                field_name = FIELD_NAMES.get(field, field.replace('_', ' ').title())
-                value = format_value(field, current_dict[field])
-                print(f"  {field_name:<15} {value:>15}")
-
-def get_field_emoji(field):
-    """Return appropriate emoji for a field."""
-    emoji_map = {
-        "price": "💰",
-        "beds": "🛏️",
-        "baths": "🚿",
-        "sqft": "📐",
-        "mls_type": "🏷️",
-        "tax_information": "💵",
-        "status": "📊",
-        "days_on_compass": "📅",
-        "last_updated": "🕒",
-        "mls_number": "🔢"
-    }
-    return emoji_map.get(field, "📝")
+            field_name = display_name(field)
+            value = format_value(field, current[field])
+            print(f"  {field_name:<15} {value:>15}")
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
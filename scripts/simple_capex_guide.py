@@ -3,6 +3,8 @@
 Simple script to test CapEx guide printing
 """
 
+import sys
+
 print("Debug: Starting simple CapEx guide script...")
 
 # CapEx Components with typical lifespans and costs
@@ -21,33 +23,38 @@ CONDITION_MULTIPLIERS = {
     "poor": 1.7        # Much higher costs for poor condition
 }
 
-print("\n" + "=" * 80)
-print(f"CAPEX COMPONENTS REFERENCE GUIDE")
-print("=" * 80)
-print("This guide shows typical CapEx components, their default lifespans and costs.")
-print("=" * 80)
-
-print(f"{'Component':<20} {'Typical Lifespan':<20} {'Cost Basis':<30}")
-print("-" * 80)
-
-for component, details in CAPEX_COMPONENTS.items():
-    component_name = component.replace('_', ' ').title()
-    lifespan = f"{details['lifespan']} years"
-    
+def format_cost_basis(details):
+    """Cost description for a component, e.g. "$1.50/sq ft + $4500.00 base"."""
     if "cost_per_sqft" in details:
         cost_basis = f"${details['cost_per_sqft']:.2f}/sq ft"
         if "cost_base" in details:
             cost_basis += f" + ${details['cost_base']:.2f} base"
-    else:
-        cost_basis = f"${details['cost_base']:.2f} flat fee"
-        
-    print(f"{component_name:<20} {lifespan:<20} {cost_basis:<30}")
-
-print("=" * 80)
-print("PROPERTY CONDITION MULTIPLIERS")
-print("-" * 80)
-for condition, multiplier in sorted(CONDITION_MULTIPLIERS.items()):
-    print(f"{condition.title():<20} {multiplier:.2f}x")
-
-print("=" * 80)
+        return cost_basis
+    return f"${details['cost_base']:.2f} flat fee"
+
+# The whole guide is built first and written to stdout in one call
+lines = [
+    "\n" + "=" * 80,
+    f"CAPEX COMPONENTS REFERENCE GUIDE",
+    "=" * 80,
+    "This guide shows typical CapEx components, their default lifespans and costs.",
+    "=" * 80,
+    f"{'Component':<20} {'Typical Lifespan':<20} {'Cost Basis':<30}",
+    "-" * 80,
+]
+lines += [
+    f"{component.replace('_', ' ').title():<20} {str(details['lifespan']) + ' years':<20} {format_cost_basis(details):<30}"
+    for component, details in CAPEX_COMPONENTS.items()
+]
+lines += [
+    "=" * 80,
+    "PROPERTY CONDITION MULTIPLIERS",
+    "-" * 80,
+]
+lines += [
+    f"{condition.title():<20} {multiplier:.2f}x"
+    for condition, multiplier in sorted(CONDITION_MULTIPLIERS.items())
+]
+lines.append("=" * 80)
+sys.stdout.write("\n".join(lines) + "\n")
 print("Debug: Script completed successfully.")